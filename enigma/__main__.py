@@ -1,34 +1,111 @@
 # stdlib imports
 import argparse
-import bz2
+import asyncio
 import datetime
 import io
+import os
 import sys
 
 # third-party module imports
 import colorama
 
 # local module imports
+import enigma.formatting as formatting
 import enigma.machine as emachine
+import enigma.progress as eprogress
 import enigma.rotors as rotors
+import enigma.server as server
+import enigma.streams as streams
+
+
+def _symbol(abet, pin):
+    """Render a pin of an alphabet as printable text"""
+    if isinstance(abet, bytes):
+        return '{0:02X}'.format(abet[pin])
+    return abet[pin]
 
 
 def _serialize_plugboard(stack):
     """Serialize a plugboard stack back into character pairings"""
+    abet = rotors._RotorBase._abet if len(stack) == 26 else rotors._BYTES
     pairs = []
-    for i in range(26):
-        if stack[i] is None:
-            continue
-        if stack[i] != i:
-            x = i
-            y = stack[i]
-            pairs.append(
-                rotors._RotorBase._abet[x] + rotors._RotorBase._abet[y]
-            )
-            stack[y] = None
+    for x, y in enumerate(stack):
+        if x < y:
+            pairs.append(_symbol(abet, x) + _symbol(abet, y))
     return pairs
 
 
+def _compressionKinds(args, prefix):
+    """List the compression formats requested for the input or output"""
+    return [
+        kind for kind in sorted(streams.COMPRESSORS)
+        if getattr(args, prefix + '_' + kind)
+    ]
+
+
+def _translateStreams(args, machine, callback):
+    """Open up the input and output streams and translate between them"""
+    # Work out the input
+    input_file = None
+
+    # input from the command-line
+    if args.input:
+        input_file = io.BytesIO(args.input.encode())
+
+    # input from stdin
+    elif args.input_std:
+        input_file = sys.stdin.buffer
+
+    # input from a file
+    elif args.input_path:
+        input_file = open(args.input_path, 'rb')
+
+    # Check for decompression flags
+    for kind in _compressionKinds(args, 'input'):
+        input_file = streams.DecompressReader(input_file, kind)
+
+    # Now let's work out the output
+    output_file = None
+
+    # output to stdout
+    if args.output_std:
+        output_file = sys.stdout.buffer
+
+    # output to a file
+    elif args.output_path:
+        output_file = open(args.output_path, 'wb')
+
+    # check for compression flags
+    for kind in _compressionKinds(args, 'output'):
+        output_file = streams.CompressWriter(output_file, kind)
+
+    # Keep track of how much was consumed, since pipes can't be sized
+    consumed = 0
+
+    def progress(current, total):
+        nonlocal consumed
+        consumed = current
+        if callback:
+            callback(current, total)
+
+    machine.translateStream(
+        stream_in=input_file,
+        stream_out=output_file,
+        chunkSize=args.chunk_size,
+        progressCallback=progress,
+        jobs=args.jobs
+    )
+
+    # Flush out the compression stages
+    while isinstance(output_file, streams.CompressWriter):
+        output_file.close()
+        output_file = output_file.stream
+    if output_file:
+        output_file.flush()
+
+    return consumed
+
+
 def main():
     colorama.init()
 
@@ -61,7 +138,7 @@ def main():
         required=False,
         help="""
         Specify a list of character pairings for the plugboard.
-        ex; AB CF HJ
+        ex; AB CF HJ. Byte mode also takes pairs of hex bytes. ex; 01EE
         """
     )
     parser.add_argument(
@@ -88,8 +165,8 @@ def main():
         default='',
         required=False,
         help="""
-        Path for the state file (loading or creating).
-        Can be used in lieu of manually specifying rotors and reflectors.
+        Path for the state file (loading or creating), stored as versioned
+        JSON. Can be used in lieu of manually specifying rotors and reflectors.
         """
     )
     parser.add_argument(
@@ -161,6 +238,22 @@ def main():
         Run input through BZ2 decompression before processing.
         """
     )
+    parser.add_argument(
+        '--input-gzip', '-igz',
+        action='store_true',
+        required=False,
+        help="""
+        Run input through GZIP decompression before processing.
+        """
+    )
+    parser.add_argument(
+        '--input-lzma', '-ixz',
+        action='store_true',
+        required=False,
+        help="""
+        Run input through LZMA (xz) decompression before processing.
+        """
+    )
 
     # Output args
     parser.add_argument(
@@ -187,15 +280,91 @@ def main():
         Run output through BZ2 compression before writing.
         """
     )
+    parser.add_argument(
+        '--output-gzip', '-ogz',
+        action='store_true',
+        required=False,
+        help="""
+        Run output through GZIP compression before writing.
+        """
+    )
+    parser.add_argument(
+        '--output-lzma', '-oxz',
+        action='store_true',
+        required=False,
+        help="""
+        Run output through LZMA (xz) compression before writing.
+        """
+    )
 
     # Other arguments
+    parser.add_argument(
+        '--mode', '-m',
+        type=str,
+        default='classic',
+        choices=['classic', 'modern', 'byte'],
+        required=False,
+        help="""
+        Which mode the enigma machine will operate in. (default: classic)
+        Classic mode will only process characters A through Z, will capitalize
+        lowercase letters, and will remove invalid ones. Modern mode will
+        preserve case, and invalid characters will pass through unchanged
+        (without affecting rotors). Byte mode will process any 8-bit
+        character, but REQUIRES that byte-compatible rotors and reflectors be
+        passed into the machine.
+        """
+    )
+    parser.add_argument(
+        '--group-size', '-gs',
+        type=int,
+        default=5,
+        required=False,
+        help="""
+        Number of letters per group of classic mode output, or 0 for one
+        continuous run of letters. (default: 5)
+        """
+    )
+    parser.add_argument(
+        '--line-groups', '-lg',
+        type=int,
+        default=0,
+        required=False,
+        help="""
+        Number of groups per line of classic mode output, or 0 to never break
+        lines. (default: 0)
+        """
+    )
     parser.add_argument(
         '--chunk-size', '-c',
         type=int,
-        default=128,
+        default=None,
+        required=False,
+        help="""
+        Chunk size for reading and writing data. (default: adapts to the
+        throughput of the streams, or 1MiB when both the input and output are
+        memory-mapped files)
+        """
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        required=False,
+        help="""
+        Number of worker processes to translate with. Anything above 1 splits
+        the input into segments that are translated in parallel.
+        """
+    )
+    parser.add_argument(
+        '--serve',
+        type=str,
+        default=None,
+        metavar='ADDRESS',
         required=False,
         help="""
-        Chunk size for reading and writing data.
+        Run as a long-lived translation daemon listening on ADDRESS, either
+        "unix:PATH" or "tcp:HOST:PORT". Clients open named machine sessions
+        that stay resident between requests. (see enigma/server.py)
         """
     )
     parser.add_argument(
@@ -206,6 +375,16 @@ def main():
         Benchmark the processing time (prints results to stderr).
         """
     )
+    parser.add_argument(
+        '--stats', '-st',
+        action='store_true',
+        required=False,
+        help="""
+        Instrument the machine and print its counters (characters translated
+        and dropped, rotor steps and turnovers, and where the time went) to
+        stderr once processing is done.
+        """
+    )
     parser.add_argument(
         '--no-progress', '-np',
         action='store_true',
@@ -232,9 +411,8 @@ def main():
 
     # Check for the list arguments
     if args.list_rotors:
-        rotorset = set(rotors._RotorBase.__subclasses__())
+        rotorset = rotors.ROTORS.values()
         print('Listing all', len(rotorset), 'rotors with short names;')
-        rotorset.remove(rotors._ReflectorBase)
         for rotor in sorted(rotorset, key=lambda x: x._name):
             print('  - {0:>30} -> {1}{2}{3}'.format(
                 rotor._name,
@@ -245,7 +423,7 @@ def main():
         return
 
     if args.list_reflectors:
-        refset = set(rotors._ReflectorBase.__subclasses__())
+        refset = rotors.REFLECTORS.values()
         print('Listing all', len(refset), 'reflectors with short names;')
         for ref in sorted(refset, key=lambda x: x._name):
             print('  - {0:>30} -> {1}{2}{3}'.format(
@@ -256,25 +434,52 @@ def main():
             ))
         return
 
+    # Hand off to the daemon, which builds its own machines per session
+    if args.serve:
+        try:
+            asyncio.run(server.Server().serve(args.serve))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    # Work out the machine mode, and how classic mode output is grouped
+    options = {
+        'machineMode': emachine.MODE[args.mode.upper()],
+        'outputMode': emachine.OUTPUT.CONTINUOUS
+    }
+    if args.group_size:
+        options['outputMode'] = emachine.OUTPUT.PENTAGRAPH
+        options['formatter'] = formatting.GroupFormatter(
+            args.group_size,
+            args.line_groups
+        )
+
     # Initialize the enigma machine using specified rotors or a state file
     machine = None
     if args.state and not args.state_create:
-        state = bz2.open(args.state, 'rb').read()
-        machine = emachine.Machine(state=state)
+        with open(args.state, 'rb') as file:
+            state = file.read()
+        machine = emachine.Machine(state=state, **options)
     elif args.state_seed:
-        machine = emachine.Machine(stateSeed=args.state_seed)
+        machine = emachine.Machine(
+            stateSeed=args.state_seed,
+            **options
+        )
     else:
         if not args.rotors or not args.reflector:
             raise ValueError('Rotors and reflectors were not provided')
         machine = emachine.Machine(
             plugboardStack=args.plugboard,
             rotorStack=args.rotors,
-            reflector=args.reflector
+            reflector=args.reflector,
+            **options
         )
 
     # If a state file needs to be created, save it and exit
     if args.state_create:
-        return bz2.open(args.state, 'wb').write(machine.stateGet())
+        with open(args.state, 'wb') as file:
+            file.write(machine.stateGet())
+        return
 
     # If the state shall be printed, make it so, and exit
     if args.state_print:
@@ -282,8 +487,11 @@ def main():
         for i, rotor in enumerate(machine.rotors):
             print(
                 'ROTOR:', i + 1, rotor._name,
-                'SETTING:', rotor._abet[rotor.setting],
-                'NOTCHES:', ', '.join([rotor._abet[n] for n in rotor.notches])
+                'SETTING:', _symbol(rotor._abet, rotor.setting),
+                'NOTCHES:', ', '.join([
+                    _symbol(rotor._abet, n)
+                    for n, notch in enumerate(rotor.notches) if notch
+                ])
             )
         print('REFLECTOR:', machine.reflector._name)
         # print('RAW:', machine.stateGet())
@@ -319,73 +527,51 @@ def main():
 
         return
 
-    # Work out the input
-    input_file = None
-
-    # input from the command-line
-    if args.input:
-        input_file = io.BytesIO(args.input.encode())
-
-    # input from stdin
-    elif args.input_std:
-        input_file = sys.stdin.buffer
-
-    # input from a file
-    elif args.input_path:
-        input_file = open(args.input_path, 'rb')
-
-    # Check for decompression flag
-    if args.input_bz2:
-        input_file = io.BytesIO(bz2.decompress(input_file.read()))
-
-    # Now let's work out the output
-    output_file = None
-
-    # output to stdout
-    if args.output_std:
-        output_file = sys.stdout.buffer
-
-    # output to a file
-    elif args.output_path:
-        output_file = open(args.output_path, 'wb')
+    # Progress meter, redrawn a few times a second at most
+    def describe():
+        return 'ROTORS: ' + ''.join(
+            [_symbol(r._abet, r.setting) for r in machine.rotors]
+        )
 
-    # check for compression flag
-    output_file_final = None
-    if args.output_bz2:
-        output_file_final = output_file
-        output_file = io.BytesIO()
+    callback = None
+    if not args.no_progress:
+        callback = eprogress.Progress(describe=describe)
 
-    # get the size of the input
-    input_file.seek(0, 2)
-    input_size = input_file.tell()
-    input_file.seek(0)
+    # Turn on instrumentation if asked to
+    if args.stats:
+        machine.statsEnable()
 
     time_start = datetime.datetime.utcnow()
 
-    # Progress callback
-    def callback(current, total):
-        rs = ''.join([r._abet[r.setting] for r in machine.rotors])
-        sys.stderr.write(
-            'ROTORS: ' + rs + '    ' +
-            'PROGRESS: ' + str(int(current / total * 100.0)) + '%\r'
+    # Plain files on both ends can be memory-mapped instead of streamed;
+    # pipes, devices, and process substitutions have to be streamed, as does
+    # anything the other input and output flags take precedence over
+    mapped = (
+        args.input_path and args.output_path and
+        not args.input and not args.input_std and not args.output_std and
+        os.path.isfile(args.input_path) and
+        (
+            not os.path.exists(args.output_path) or
+            os.path.isfile(args.output_path)
+        ) and
+        not _compressionKinds(args, 'input') and
+        not _compressionKinds(args, 'output') and
+        args.jobs == 1
+    )
+    if mapped:
+        input_size = os.path.getsize(args.input_path)
+        machine.translateMapped(
+            args.input_path,
+            args.output_path,
+            progressCallback=callback,
+            chunkSize=args.chunk_size or 1 << 20
         )
 
-    # Flip it off if needed
-    if args.no_progress:
-        callback = None
-
-    machine.translateStream(
-        stream_in=input_file,
-        stream_out=output_file,
-        chunkSize=args.chunk_size,
-        progressCallback=callback
-    )
+    else:
+        input_size = _translateStreams(args, machine, callback)
 
-    # Final compression bit
-    if args.output_bz2:
-        output_file.seek(0)
-        mid = bz2.compress(output_file.read())
-        output_file_final.write(mid)
+    if callback:
+        callback.finish()
 
     # Collect time for benchmarking
     if args.benchmark:
@@ -401,10 +587,31 @@ def main():
 {4:>10.2f} MEGABYTES/s
         """.format(input_size, time_delta, bps, kbps, mbps).strip())
 
+    # Print the instrumentation counters
+    if args.stats:
+        stats = machine.stats()
+        sys.stderr.write('\n')
+        for key in ('chunks', 'characters', 'translated', 'dropped',
+                    'passedThrough'):
+            sys.stderr.write('{0:>14}: {1}\n'.format(key, stats[key]))
+        for i, rotor in enumerate(machine.rotors):
+            line = '{0:>14}: {1} STEPS, {2} TURNOVERS ({3})\n'
+            sys.stderr.write(line.format(
+                'ROTOR ' + str(i + 1),
+                stats['rotorSteps'][i],
+                stats['turnovers'][i],
+                rotor._name
+            ))
+        for phase, seconds in stats['time'].items():
+            sys.stderr.write('{0:>14}: {1:.3f} SECONDS\n'.format(
+                phase, seconds
+            ))
+
     # Write back to the state file if asked to
     if args.state_update:
         if args.state:
-            open(args.state, 'wb').write(machine.stateGet())
+            with open(args.state, 'wb') as file:
+                file.write(machine.stateGet())
 
 # Run if main
 if __name__ == '__main__':
@@ -0,0 +1,383 @@
+# stdlib imports
+import argparse
+import collections
+import io
+import json
+import platform
+import random
+import sys
+import time
+
+# third party imports
+
+# local module imports
+import enigma.engine as engine
+import enigma.machine as emachine
+import enigma.rotors as rotors
+
+
+# Version of the results format written by `run`
+RESULTS_VERSION = 1
+
+# Every benchmark, keyed by name. Each entry is a setup function that takes
+# the data size and returns a function performing one run, along with the
+# number of units that one run processes, and the name of that unit.
+BENCHMARKS = collections.OrderedDict()
+
+# Machine used by most of the benchmarks
+_ROTORS = ['11:A', '12:B', '13:C']
+_REFLECTOR = '1b'
+_PLUGBOARD = ['AB', 'CD', 'EF', 'GH', 'IJ', 'KL', 'MN', 'OP', 'QR', 'ST']
+
+
+def benchmark(name, unit):
+    '''Decorator registering a benchmark setup function under `name`'''
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, unit)
+        return setup
+    return decorator
+
+
+def _text(size):
+    '''Deterministic, vaguely prose-shaped test data'''
+    rand = random.Random(size)
+    words = [
+        ''.join(rand.choice('ETAOINSHRDLUCMFWYPVBGKQJXZ') for i in range(n))
+        for n in (rand.randint(1, 9) for j in range(512))
+    ]
+    text = ' '.join(rand.choice(words) for i in range(size // 4))
+    return text.encode()[:size]
+
+
+def _machine(**kwargs):
+    return emachine.Machine(
+        plugboardStack=_PLUGBOARD,
+        rotorStack=_ROTORS,
+        reflector=_REFLECTOR,
+        **kwargs
+    )
+
+
+# # # Construction and state # # #
+
+@benchmark('construct/rotor', 'rotors')
+def _constructRotor(size):
+    def run():
+        for i in range(1000):
+            rotors.stringToRotor('11:C')
+    return run, 1000
+
+
+@benchmark('construct/machine', 'machines')
+def _constructMachine(size):
+    def run():
+        for i in range(100):
+            _machine()
+    return run, 100
+
+
+@benchmark('construct/seed', 'machines')
+def _constructSeed(size):
+    def run():
+        for i in range(100):
+            emachine.Machine(stateSeed='benchmark')
+    return run, 100
+
+
+@benchmark('state/get', 'states')
+def _stateGet(size):
+    machine = _machine()
+
+    def run():
+        for i in range(1000):
+            machine.stateGet()
+    return run, 1000
+
+
+@benchmark('state/set', 'states')
+def _stateSet(size):
+    machine = _machine()
+    state = machine.stateGet()
+
+    def run():
+        for i in range(1000):
+            machine.stateSet(state)
+    return run, 1000
+
+
+# # # Translation # # #
+
+@benchmark('pin/legacy', 'pins')
+def _translatePin(size):
+    machine = _machine()
+    pins = [b % 26 for b in _text(10000)]
+
+    def run():
+        for pin in pins:
+            machine.translatePin(pin)
+    return run, len(pins)
+
+
+def _chunk(mode, backend, cycle=False):
+    '''Build a benchmark translating whole chunks in one go'''
+    def setup(size):
+        if mode == emachine.MODE.BYTE:
+            machine = emachine.Machine(
+                rotorStack=['byte1', 'byte2', 'byte3'],
+                reflector='bytea',
+                machineMode=mode,
+                backend=backend
+            )
+        else:
+            machine = _machine(machineMode=mode, backend=backend, cycle=cycle)
+        data = _text(size)
+        machine.translateChunk(data[:1])
+
+        def run():
+            machine.translateChunk(data)
+        return run, len(data)
+    return setup
+
+
+for _mode in emachine.MODE:
+    for _backend in emachine.BACKEND:
+        if _backend == emachine.BACKEND.NUMPY and engine.numpy is None:
+            continue
+        benchmark(
+            'chunk/{0}/{1}'.format(_mode.name.lower(), _backend.name.lower()),
+            'bytes'
+        )(_chunk(_mode, _backend))
+benchmark('chunk/classic/cycle', 'bytes')(
+    _chunk(emachine.MODE.CLASSIC, emachine.BACKEND.PYTHON, cycle=True)
+)
+
+
+def _stream(chunkSize):
+    '''Build a benchmark translating a stream in `chunkSize` pieces'''
+    def setup(size):
+        machine = _machine()
+        data = _text(size)
+
+        def run():
+            machine.translateStream(
+                io.BytesIO(data),
+                io.BytesIO(),
+                chunkSize=chunkSize
+            )
+        return run, len(data)
+    return setup
+
+
+for _chunkSize in (128, 4096, 65536):
+    benchmark('stream/{0}'.format(_chunkSize), 'bytes')(_stream(_chunkSize))
+
+
+def _family(rotorNames, reflectorName):
+    '''Build a benchmark translating through one family's rotors'''
+    def setup(size):
+        machine = emachine.Machine(
+            rotorStack=rotorNames,
+            reflector=reflectorName,
+            machineMode=emachine.MODE.BYTE if rotorNames[0].startswith('byte')
+            else emachine.MODE.CLASSIC
+        )
+        data = _text(size // 4)
+
+        def run():
+            machine.translateChunk(data)
+        return run, len(data)
+    return setup
+
+
+for _name, (_rotorNames, _reflectorNames) in rotors.families().items():
+    if _rotorNames and _reflectorNames:
+        benchmark(
+            'family/' + _name.lower().replace(' ', '-'), 'bytes'
+        )(_family((_rotorNames * 3)[:3], _reflectorNames[0]))
+
+
+# # # Running and comparing # # #
+
+def measure(run, repeat=5, minTime=0.2):
+    '''
+    Time `run`, returning the best time of a single call. Fast runs are
+    looped until each measurement takes at least `minTime` seconds.
+    '''
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for i in range(loops):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= minTime:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, int(minTime / elapsed) + 1)
+
+    best = elapsed / loops
+    for i in range(repeat - 1):
+        start = time.perf_counter()
+        for j in range(loops):
+            run()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def run(names=None, size=1 << 20, repeat=5, minTime=0.2, callback=None):
+    '''
+    Run the named benchmarks (or all of them), returning a JSON-compatible
+    dictionary of results.
+    '''
+    results = collections.OrderedDict()
+    for name in names or BENCHMARKS:
+        setup, unit = BENCHMARKS[name]
+        call, units = setup(size)
+        seconds = measure(call, repeat, minTime)
+        results[name] = {
+            'unit': unit,
+            'units': units,
+            'seconds': seconds,
+            'rate': units / seconds
+        }
+        if callback:
+            callback(name, results[name])
+
+    return {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': engine.numpy is not None,
+        'size': size,
+        'results': results
+    }
+
+
+def compare(results, baseline, threshold=0.15):
+    '''
+    Compare results against a baseline, returning a list of
+    (name, ratio, regressed) tuples for every benchmark both have run. The
+    ratio is the current rate over the baseline rate, and anything slower
+    than the baseline by more than `threshold` counts as a regression.
+    '''
+    if baseline.get('version') != RESULTS_VERSION:
+        raise ValueError(
+            'Unsupported baseline version ' + str(baseline.get('version'))
+        )
+    comparison = []
+    for name, result in results['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = result['rate'] / base['rate']
+        comparison.append((name, ratio, ratio < 1.0 - threshold))
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='enigma.benchmark',
+        description='Benchmark the enigma machine, optionally against a '
+                    'stored baseline'
+    )
+
+    parser.add_argument(
+        'filters',
+        nargs='*',
+        help="""
+        Only run benchmarks whose names contain one of these strings.
+        """
+    )
+    parser.add_argument(
+        '--output', '-o',
+        type=str,
+        default=None,
+        help="""
+        Write the JSON results to this path instead of stdout. (pass it as
+        --baseline later to track regressions)
+        """
+    )
+    parser.add_argument(
+        '--baseline', '-bl',
+        type=str,
+        default=None,
+        help="""
+        Compare against the JSON results in this file, and exit with status 1
+        if anything regressed.
+        """
+    )
+    parser.add_argument(
+        '--threshold', '-th',
+        type=float,
+        default=0.15,
+        help="""
+        Fraction of a baseline's rate that a benchmark may lose before it
+        counts as a regression. (default 0.15)
+        """
+    )
+    parser.add_argument(
+        '--size', '-sz',
+        type=int,
+        default=1 << 20,
+        help="""
+        Size of the translation test data, in bytes. (default 1MiB)
+        """
+    )
+    parser.add_argument(
+        '--repeat', '-r',
+        type=int,
+        default=5,
+        help="""
+        Number of measurements per benchmark; the best one is kept.
+        """
+    )
+    parser.add_argument(
+        '--list', '-l',
+        action='store_true',
+        help="""
+        List the available benchmarks and exit.
+        """
+    )
+    args = parser.parse_args()
+
+    names = [
+        name for name in BENCHMARKS
+        if not args.filters or any(f in name for f in args.filters)
+    ]
+    if args.list:
+        for name in names:
+            print(name)
+        return 0
+
+    def progress(name, result):
+        sys.stderr.write('{0:<28} {1:>14,.0f} {2}/s\n'.format(
+            name, result['rate'], result['unit']
+        ))
+
+    results = run(names, args.size, args.repeat, callback=progress)
+
+    # Write out the results
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+    # Check for regressions
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+        regressions = 0
+        sys.stderr.write('\nAgainst baseline {0};\n'.format(args.baseline))
+        for name, ratio, regressed in compare(
+                results, baseline, args.threshold):
+            regressions += regressed
+            sys.stderr.write('{0:<28} {1:>7.2f}x{2}\n'.format(
+                name, ratio, '  REGRESSION' if regressed else ''
+            ))
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
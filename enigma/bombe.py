@@ -0,0 +1,499 @@
+# stdlib imports
+import argparse
+import concurrent.futures
+import itertools
+import multiprocessing
+import os
+import sys
+
+# third party imports
+
+# local module imports
+import enigma.engine as engine
+import enigma.machine as emachine
+import enigma.progress as eprogress
+import enigma.rotors as rotors
+
+
+# Size of the classic alphabet that cribs are written in
+_SIZE = 26
+_IDENTITY = bytes(range(_SIZE))
+
+# Event that calls off the search in progress, set in worker processes
+_stop = None
+
+
+def _pins(text):
+    '''Reduce text to the pins of its letters, the way classic mode does'''
+    if isinstance(text, str):
+        text = text.encode()
+    return bytes(text).translate(
+        emachine._CLASSIC_PINS, emachine._CLASSIC_DELETE
+    )
+
+
+def cribOffsets(ciphertext, crib):
+    '''
+    Return every offset into the ciphertext that the crib could sit at. An
+    Enigma never enciphers a letter as itself, so any alignment that puts a
+    crib letter over the same ciphertext letter is ruled out.
+    '''
+    cipher = _pins(ciphertext)
+    crib = _pins(crib)
+    return [
+        offset for offset in range(len(cipher) - len(crib) + 1)
+        if not any(p == c for p, c in zip(crib, cipher[offset:]))
+    ]
+
+
+class Menu:
+    """
+    Letter-loop menu of a crib laid against ciphertext. Every crib letter
+    and the ciphertext letter under it are joined by the scrambler (the
+    rotors and reflector, without the plugboard) at that position.
+
+    Each connected group of letters is spanned by a tree from its most
+    connected letter, and every other link closes a loop. A guess at the
+    plugboard partner of the root letter fixes the partner of every letter in
+    the tree, and only survives if each loop comes back around consistently.
+    Groups without loops can't rule anything out, so they're left out.
+    """
+
+    def __init__(self, ciphertext, crib, offset=0):
+        cipher = _pins(ciphertext)
+        crib = _pins(crib)
+        if not crib:
+            raise ValueError('The crib has no letters in it')
+        if offset < 0 or offset + len(crib) > len(cipher):
+            raise ValueError('The crib runs past the end of the ciphertext')
+
+        self.offset = offset
+        self.length = len(crib)
+
+        # Link up the letters, numbering each link by its crib position
+        links = [[] for i in range(_SIZE)]
+        for index, (p, c) in enumerate(zip(crib, cipher[offset:])):
+            if p == c:
+                raise ValueError(
+                    'Crib letter ' + str(index) + ' lies over the same '
+                    'ciphertext letter, which an Enigma never does'
+                )
+            links[p].append((c, index))
+            links[c].append((p, index))
+
+        # Span each group of letters, most connected first
+        self.components = []
+        seen = [False] * _SIZE
+        used = set()
+        for root in sorted(range(_SIZE), key=lambda p: -len(links[p])):
+            if seen[root] or not links[root]:
+                continue
+            seen[root] = True
+            letters = [root]
+            tree = []
+            loops = []
+            for letter in letters:
+                for other, index in links[letter]:
+                    if index in used:
+                        continue
+                    used.add(index)
+                    if seen[other]:
+                        loops.append((letter, other, index))
+                    else:
+                        seen[other] = True
+                        letters.append(other)
+                        tree.append((letter, other, index))
+            if loops:
+                self.components.append((root, letters, tree, loops))
+
+        self.loops = sum(len(c[3]) for c in self.components)
+        if not self.loops:
+            raise ValueError(
+                'The menu has no loops, so it would stop everywhere; '
+                'try a longer crib'
+            )
+
+    def _partners(self, component, tables):
+        '''Every plugboard consistent with one group of letters'''
+        root, letters, tree, loops = component
+
+        # Partner of each letter in terms of the root letter's partner
+        through = [None] * _SIZE
+        through[root] = _IDENTITY
+        for letter, other, index in tree:
+            through[other] = through[letter].translate(tables[index])
+
+        # Every loop has to come back around to the same partner
+        candidates = range(_SIZE)
+        for letter, other, index in loops:
+            around = through[letter].translate(tables[index])
+            back = through[other]
+            candidates = [x for x in candidates if around[x] == back[x]]
+            if not candidates:
+                return []
+
+        # The plugboard is symmetric, so no two letters may share a partner
+        plugs = []
+        for x in candidates:
+            plug = [None] * _SIZE
+            for letter in letters:
+                partner = through[letter][x]
+                if plug[letter] not in (None, partner) or \
+                        plug[partner] not in (None, letter):
+                    break
+                plug[letter] = partner
+                plug[partner] = letter
+            else:
+                plugs.append(plug)
+        return plugs
+
+    def test(self, tables):
+        '''
+        Test the menu against the scrambler tables of every crib position,
+        returning each plugboard (a list of partners, None where unknown) that
+        is consistent with all of it.
+        '''
+        solutions = [[None] * _SIZE]
+        for component in self.components:
+            found = []
+            for plug in self._partners(component, tables):
+                for solution in solutions:
+                    merged = list(solution)
+                    for letter, partner in enumerate(plug):
+                        if partner is None:
+                            continue
+                        if merged[letter] not in (None, partner):
+                            break
+                        merged[letter] = partner
+                    else:
+                        found.append(merged)
+            solutions = found
+            if not solutions:
+                break
+        return solutions
+
+
+class Stop:
+    """
+    A rotor order and start position that the menu is consistent with, and
+    the plugboard pairs it implies. Letters outside of the menu's loops are
+    left unplugged, so those still have to be worked out.
+    """
+
+    def __init__(self, rotorStack, reflector, plugboardStack):
+        self.rotorStack = rotorStack
+        self.reflector = reflector
+        self.plugboardStack = plugboardStack
+
+    def __repr__(self):
+        return 'Stop({0!r}, {1!r}, {2!r})'.format(
+            self.rotorStack, self.reflector, self.plugboardStack
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, Stop) and (
+            self.rotorStack, self.reflector, self.plugboardStack
+        ) == (other.rotorStack, other.reflector, other.plugboardStack)
+
+    def machine(self, **kwargs):
+        '''Build a machine set up at this stop, ready to decipher'''
+        return emachine.Machine(
+            plugboardStack=self.plugboardStack,
+            rotorStack=self.rotorStack,
+            reflector=self.reflector,
+            **kwargs
+        )
+
+
+def _stack(order, start):
+    '''Rotor specs for a rotor order set to a start position'''
+    abet = rotors._RotorBase._abet
+    return [name + ':' + abet[setting] for name, setting in zip(order, start)]
+
+
+def rotorOrders(rotorNames=None, reflectorNames=None, slots=3):
+    '''
+    List every (rotor order, reflector) pair to search; each order of
+    `slots` rotors drawn from `rotorNames` (the Enigma I rotors by default)
+    with each of `reflectorNames` (UKW B by default). Only classic 26-letter
+    wirings can be searched.
+    '''
+    if rotorNames is None:
+        rotorNames = rotors.families()['Enigma I'][0]
+    if reflectorNames is None:
+        reflectorNames = ['1b']
+    for names, registry, kind in (
+            (rotorNames, rotors.ROTORS, 'rotor'),
+            (reflectorNames, rotors.REFLECTORS, 'reflector')):
+        for name in names:
+            cls = registry.get(name)
+            if cls is None:
+                raise ValueError(
+                    name + ' is not a valid ' + kind + ' short-name'
+                )
+            if len(cls._abet) != _SIZE:
+                raise ValueError(
+                    cls._name + ' is not a classic 26-letter wiring'
+                )
+
+    return [
+        (order, reflector)
+        for reflector in reflectorNames
+        for order in itertools.permutations(rotorNames, slots)
+    ]
+
+
+def _initWorker(stop):
+    '''Hand a worker process the event that calls off the search'''
+    global _stop
+    _stop = stop
+
+
+def _stopped():
+    '''Check whether the search this worker is part of has been called off'''
+    return _stop is not None and _stop.is_set()
+
+
+def _runOrders(function, args, orders, jobs, finish):
+    '''
+    Call `function(*args, order, reflector)` for every rotor order, over
+    `jobs` worker processes, passing each order's index and result to
+    `finish`. The rest of the orders are called off as soon as `finish`
+    returns something true; orders that haven't started are cancelled, and
+    running ones give up as soon as they next check `_stopped`.
+    '''
+    if jobs == 1:
+        for index, (order, reflector) in enumerate(orders):
+            if finish(index, function(*args, order, reflector)):
+                break
+        return
+
+    stop = multiprocessing.Event()
+    with concurrent.futures.ProcessPoolExecutor(
+            jobs, initializer=_initWorker, initargs=(stop,)) as executor:
+        futures = {
+            executor.submit(function, *args, order, reflector): index
+            for index, (order, reflector) in enumerate(orders)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            if finish(futures[future], future.result()):
+                stop.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+                break
+
+
+def _addSearchArguments(parser):
+    '''Add the options shared by the rotor order searches to a parser'''
+    parser.add_argument(
+        '--family', '-f',
+        type=str,
+        default='Enigma I',
+        help="""
+        Machine family to draw the rotors and reflectors from. (default:
+        "Enigma I")
+        """
+    )
+    parser.add_argument(
+        '--rotors', '-ro',
+        nargs='+',
+        default=None,
+        help="""
+        Short-names of the rotors to draw the rotor orders from, instead of
+        every rotor of the family.
+        """
+    )
+    parser.add_argument(
+        '--reflectors', '-rf',
+        nargs='+',
+        default=None,
+        help="""
+        Short-names of the reflectors to try, instead of every reflector of
+        the family.
+        """
+    )
+    parser.add_argument(
+        '--slots', '-sl',
+        type=int,
+        default=3,
+        help="""
+        Number of rotors in the machine. (default: 3)
+        """
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=os.cpu_count() or 1,
+        help="""
+        Number of worker processes to search with. (default: one per CPU)
+        """
+    )
+    parser.add_argument(
+        '--no-progress', '-np',
+        action='store_true',
+        help="""
+        Suppress the progress meter that is normally written to stderr.
+        """
+    )
+
+
+def _searchNames(parser, args):
+    '''Work out the rotor and reflector names to search from the options'''
+    family = rotors.families().get(args.family)
+    if family is None:
+        parser.error(args.family + ' is not a known machine family')
+    for name in args.rotors or ():
+        if name not in rotors.ROTORS:
+            parser.error(name + ' is not a valid rotor short-name')
+    for name in args.reflectors or ():
+        if name not in rotors.REFLECTORS:
+            parser.error(name + ' is not a valid reflector short-name')
+    return args.rotors or family[0], args.reflectors or family[1]
+
+
+def _searchOrder(menu, limit, order, reflector):
+    '''Run one rotor order through every start position'''
+    stack = [rotors.stringToRotor(name) for name in order]
+    compiled = engine.Engine(
+        _IDENTITY, stack, rotors.stringToReflector(reflector)
+    )
+    abet = rotors._RotorBase._abet
+
+    stops = []
+    for start in itertools.product(range(_SIZE), repeat=len(order)):
+        if _stopped():
+            break
+        settings = start
+        if menu.offset:
+            settings = compiled.settingsAfter(start, menu.offset)
+        for plug in menu.test(compiled.positions(settings, menu.length)):
+            stops.append(Stop(
+                _stack(order, start),
+                reflector,
+                [
+                    abet[x] + abet[y] for x, y in enumerate(plug)
+                    if y is not None and x < y
+                ]
+            ))
+            if limit and len(stops) >= limit:
+                return stops
+    return stops
+
+
+def search(
+        menu,
+        rotorNames=None,
+        reflectorNames=None,
+        slots=3,
+        jobs=1,
+        limit=None,
+        progressCallback=None
+        ):
+    '''
+    Try every order of `slots` rotors drawn from `rotorNames` (the Enigma I
+    rotors by default) with each of `reflectorNames` (UKW B by default), at
+    every start position, returning the stops in order.
+
+    The rotor orders are shared out over `jobs` worker processes. Once
+    `limit` stops have been found, the rest of the search is called off.
+    `progressCallback` is called with the number of rotor orders done and the
+    total after each one.
+    '''
+    orders = rotorOrders(rotorNames, reflectorNames, slots)
+    found = [None] * len(orders)
+    done = 0
+
+    def finish(index, stops):
+        nonlocal done
+        found[index] = stops
+        done += 1
+        if progressCallback:
+            progressCallback(done, len(orders))
+        return limit and sum(len(s) for s in found if s) >= limit
+
+    _runOrders(_searchOrder, (menu, limit), orders, jobs, finish)
+
+    stops = [stop for stops in found if stops for stop in stops]
+    return stops[:limit] if limit else stops
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='enigma.bombe',
+        description='Search for the rotor order and start position of a '
+                    'classic ciphertext, given a crib'
+    )
+
+    parser.add_argument(
+        'ciphertext',
+        help="""
+        The ciphertext. Anything but letters is ignored.
+        """
+    )
+    parser.add_argument(
+        'crib',
+        help="""
+        Plaintext known (or guessed) to be somewhere in the message.
+        """
+    )
+    parser.add_argument(
+        '--offset', '-of',
+        type=int,
+        default=None,
+        help="""
+        Letter offset of the crib within the ciphertext. (default: the first
+        offset that the crib could sit at)
+        """
+    )
+    _addSearchArguments(parser)
+    parser.add_argument(
+        '--limit', '-l',
+        type=int,
+        default=None,
+        help="""
+        Stop searching once this many stops have been found.
+        """
+    )
+    args = parser.parse_args()
+
+    offset = args.offset
+    if offset is None:
+        offsets = cribOffsets(args.ciphertext, args.crib)
+        if not offsets:
+            parser.error('The crib fits nowhere in the ciphertext')
+        offset = offsets[0]
+    try:
+        menu = Menu(args.ciphertext, args.crib, offset)
+    except ValueError as error:
+        parser.error(str(error))
+
+    rotorNames, reflectorNames = _searchNames(parser, args)
+    sys.stderr.write('Crib at offset {0}, with {1} loops in the menu\n'.format(
+        offset, menu.loops
+    ))
+
+    progress = None
+    if not args.no_progress:
+        progress = eprogress.Progress(unit='ORDERS')
+    stops = search(
+        menu,
+        rotorNames,
+        reflectorNames,
+        slots=args.slots,
+        jobs=args.jobs,
+        limit=args.limit,
+        progressCallback=progress
+    )
+    if progress:
+        progress.finish()
+
+    for stop in stops:
+        print('{0}  {1}  {2}'.format(
+            ' '.join(stop.rotorStack),
+            stop.reflector,
+            ' '.join(stop.plugboardStack)
+        ))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,255 @@
+# stdlib imports
+import argparse
+import itertools
+import sys
+
+# third party imports
+
+# local module imports
+import enigma.bombe as bombe
+import enigma.engine as engine
+import enigma.progress as eprogress
+import enigma.rotors as rotors
+
+
+_SIZE = bombe._SIZE
+
+
+def _coincidences(rows):
+    '''Index of coincidence of every row of a 2D array of pins'''
+    numpy = engine.numpy
+    count, length = rows.shape
+
+    # Count every row's letters in one go, by giving each row its own bins
+    bins = numpy.arange(count, dtype=numpy.intp)
+    bins *= _SIZE
+    bins = rows + bins[:, None]
+    counts = numpy.bincount(
+        bins.ravel(), minlength=count * _SIZE
+    ).reshape(count, _SIZE)
+    return (counts * (counts - 1)).sum(axis=1) / (length * (length - 1))
+
+
+def coincidence(text):
+    '''
+    Index of coincidence of the letters of a text; the chance that two of its
+    letters picked at random are the same. Roughly 0.067 for English, 0.076
+    for German, and 0.038 for uniformly random letters.
+    '''
+    pins = bombe._pins(text)
+    if len(pins) < 2:
+        return 0.0
+    counts = [pins.count(pin) for pin in range(_SIZE)]
+    return sum(c * (c - 1) for c in counts) / (len(pins) * (len(pins) - 1))
+
+
+class Candidate(bombe.Stop):
+    """
+    A rotor order and start position, scored by the index of coincidence of
+    the ciphertext deciphered there.
+    """
+
+    def __init__(self, score, rotorStack, reflector, plugboardStack):
+        super().__init__(rotorStack, reflector, plugboardStack)
+        self.score = score
+
+    def __repr__(self):
+        return 'Candidate({0!r}, {1!r}, {2!r}, {3!r})'.format(
+            self.score, self.rotorStack, self.reflector, self.plugboardStack
+        )
+
+    def __eq__(self, other):
+        return super().__eq__(other) and \
+            self.score == getattr(other, 'score', None)
+
+
+def _scoreOrder(pins, top, batchSize, order, reflector):
+    '''
+    Decipher with one rotor order from every start position, returning the
+    `top` best (score, start) pairs.
+
+    Stepping walks the start positions around in cycles (usually just one),
+    so each cycle's substitution tables are compiled once, and a whole batch
+    of start positions along it is deciphered as a 2D array of offsets into
+    those tables.
+    '''
+    numpy = engine.numpy
+    stack = [rotors.stringToRotor(name) for name in order]
+    compiled = engine.Engine(
+        bytes(range(_SIZE)), stack, rotors.stringToReflector(reflector)
+    )
+
+    count = len(pins)
+    letters = numpy.frombuffer(pins, dtype=numpy.uint8)
+    steps = numpy.arange(count, dtype=numpy.intp)
+    rows = max(1, batchSize // count)
+
+    starts = []
+    scores = []
+    covered = set()
+    for start in itertools.product(range(_SIZE), repeat=len(order)):
+        if start in covered:
+            continue
+        compiled.settings = list(start)
+        period = compiled.compileCycle(_SIZE ** len(order))
+        covered.update(compiled.cycleStates)
+        starts.extend(compiled.cycleStates)
+
+        tables = numpy.frombuffer(compiled.cycle, dtype=numpy.uint8)
+        for i in range(0, period, rows):
+            offsets = numpy.arange(
+                i, min(i + rows, period), dtype=numpy.intp
+            )[:, None] + steps
+            offsets %= period
+            offsets *= _SIZE
+            offsets += letters
+            scores.append(_coincidences(tables.take(offsets)))
+
+    # Best first, keeping the enumeration order between equal scores
+    scores = numpy.concatenate(scores)
+    best = numpy.argsort(-scores, kind='stable')[:top]
+    return [(float(scores[i]), starts[i]) for i in best]
+
+
+def search(
+        ciphertext,
+        rotorNames=None,
+        reflectorNames=None,
+        slots=3,
+        top=10,
+        plugboardStack=(),
+        jobs=1,
+        batchSize=1 << 21,
+        progressCallback=None
+        ):
+    '''
+    Decipher a classic ciphertext under every order of `slots` rotors drawn
+    from `rotorNames` (the Enigma I rotors by default) with each of
+    `reflectorNames` (UKW B by default), at every start position, and return
+    the `top` candidates ranked by index of coincidence. Requires numpy.
+
+    Any plugboard pairs already known can be given as `plugboardStack`;
+    otherwise letters are taken as unplugged. Start positions are deciphered
+    in batches of up to roughly `batchSize` letters at once (as 2D arrays,
+    one row per start position), and the rotor orders are shared out over
+    `jobs` worker processes. `progressCallback` is called with the number of
+    rotor orders done and the total after each one.
+    '''
+    if engine.numpy is None:
+        raise ImportError(
+            'The coincidence search requires numpy to be installed'
+        )
+
+    pins = bombe._pins(ciphertext)
+    if len(pins) < 2:
+        raise ValueError('The ciphertext needs at least two letters')
+
+    # The plugboard's way back out doesn't change the letter counts, so only
+    # the way in matters
+    abet = rotors._RotorBase._abet
+    plugboard = bytearray(range(_SIZE))
+    for pair in plugboardStack:
+        x = abet.index(pair[0].upper())
+        y = abet.index(pair[1].upper())
+        plugboard[x] = y
+        plugboard[y] = x
+    pins = pins.translate(bytes(plugboard) + bytes(range(_SIZE, 256)))
+
+    orders = bombe.rotorOrders(rotorNames, reflectorNames, slots)
+    scored = [None] * len(orders)
+
+    def finish(index, best):
+        scored[index] = best
+        if progressCallback:
+            progressCallback(
+                sum(1 for s in scored if s is not None), len(orders)
+            )
+
+    bombe._runOrders(
+        _scoreOrder, (pins, top, batchSize), orders, jobs, finish
+    )
+
+    # Rank everything, keeping the enumeration order between equal scores
+    ranked = sorted(
+        (
+            (-score, index, start)
+            for index, best in enumerate(scored)
+            for score, start in best
+        )
+    )[:top]
+    return [
+        Candidate(
+            -score,
+            bombe._stack(orders[index][0], start),
+            orders[index][1],
+            list(plugboardStack)
+        )
+        for score, index, start in ranked
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='enigma.coincidence',
+        description='Rank the rotor orders and start positions of a classic '
+                    'ciphertext by the index of coincidence of its '
+                    'decipherment'
+    )
+
+    parser.add_argument(
+        'ciphertext',
+        help="""
+        The ciphertext. Anything but letters is ignored.
+        """
+    )
+    bombe._addSearchArguments(parser)
+    parser.add_argument(
+        '--plugboard', '-p',
+        nargs='+',
+        default=[],
+        help="""
+        Plugboard pairs that are already known. ex; AB CF HJ
+        """
+    )
+    parser.add_argument(
+        '--top', '-k',
+        type=int,
+        default=10,
+        help="""
+        Number of candidates to list. (default: 10)
+        """
+    )
+    args = parser.parse_args()
+
+    rotorNames, reflectorNames = bombe._searchNames(parser, args)
+
+    progress = None
+    if not args.no_progress:
+        progress = eprogress.Progress(unit='ORDERS')
+    try:
+        candidates = search(
+            args.ciphertext,
+            rotorNames,
+            reflectorNames,
+            slots=args.slots,
+            top=args.top,
+            plugboardStack=args.plugboard,
+            jobs=args.jobs,
+            progressCallback=progress
+        )
+    except (ImportError, ValueError) as error:
+        parser.error(str(error))
+    if progress:
+        progress.finish()
+
+    for candidate in candidates:
+        print('{0:.5f}  {1}  {2}'.format(
+            candidate.score,
+            ' '.join(candidate.rotorStack),
+            candidate.reflector
+        ))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
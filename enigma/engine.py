@@ -0,0 +1,594 @@
+# stdlib imports
+
+# third party imports
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# local module imports
+
+
+# Identity table used to pad short permutations out to 256 entries so that
+# they can be composed with `bytes.translate`
+_IDENTITY = bytes(range(256))
+
+
+def _pad(perm):
+    """Pad a permutation of N < 256 symbols out to a full translation table"""
+    return bytes(perm) + _IDENTITY[len(perm):]
+
+
+# Expanded wiring tables, shared by every engine using the same rotor class
+_expanded = {}
+
+
+class Engine:
+    """
+    Compiled form of a machine's plugboard, rotors, and reflector.
+
+    Every rotor wiring is expanded into one flat substitution table per rotor
+    setting, and the signal path through the rotors for a given rotor position
+    is folded into a single table. Translating a pin is then one table lookup
+    followed by an odometer advance, instead of a recursive walk across the
+    rotors.
+
+    The plugboard is kept as a separate 256-entry table (`plugboard`) so that
+    callers can fold it into their own `bytes.translate` stages; the pins fed
+    to `translate` are expected to have already passed through it.
+    """
+
+    def __init__(self, plugboard, rotorStack, reflector, cacheSize=None):
+        # Alphabet size is dictated by the rotor wirings
+        self.size = len(rotorStack[0].wiring_forward)
+
+        # Wiring tables for every rotor, indexed by rotor setting
+        self.plugboard = _pad(plugboard)
+        self.forward = [self._tables(r)[0] for r in rotorStack]
+        self.reverse = [self._tables(r)[1] for r in rotorStack]
+        self.reflect = self._tables(reflector)[0][reflector.setting]
+
+        # Stepping information for the odometer
+        self.notches = [bytes(r.notches) for r in rotorStack]
+        self.stepping = [r._stepping for r in rotorStack]
+        self.settings = [r.setting for r in rotorStack]
+
+        # Running notch counts around two laps of each rotor, for counting
+        # turnovers over any span of steps without walking through it
+        self.turnovers = []
+        for notches in self.notches:
+            counts = [0]
+            for i in range(2 * self.size):
+                counts.append(counts[-1] + notches[i % self.size])
+            self.turnovers.append(counts)
+
+        # Position tables, keyed by the settings of every rotor but the first.
+        # By default the cache is capped at roughly 16MiB of tables.
+        if cacheSize is None:
+            cacheSize = max(1, (1 << 24) // (self.size * 256))
+        self.cacheSize = cacheSize
+        self._blocks = {}
+        self._inners = {}
+
+        # Position tables only pay off if every upper rotor position fits in
+        # the cache; otherwise (ex; byte rotors) each table would be built for
+        # a single pin, and it's cheaper to go around the first rotor per pin
+        self.blocks = self.size ** (len(rotorStack) - 1) <= cacheSize
+
+        # Full-period keystream table (only when compiled)
+        self.cycle = None
+        self.cycleLimit = None
+        self.cycleStates = None
+        self.cycleIndex = None
+        self.period = None
+        self.position = 0
+
+        # NumPy views of the tables (only when the NumPy backend is used)
+        self._arrays = None
+
+    def _tables(self, rotor):
+        """Return the expanded forward and reverse tables of a rotor's class"""
+        tables = _expanded.get(type(rotor))
+        if tables is None:
+            tables = _expanded[type(rotor)] = (
+                self._expand(rotor.wiring_forward),
+                self._expand(rotor.wiring_reverse)
+            )
+        return tables
+
+    def _expand(self, wiring):
+        """Expand a relative wiring array into one table per rotor setting"""
+        n = self.size
+        return [
+            _pad([(p + wiring[(p + s) % n]) % n for p in range(n)])
+            for s in range(n)
+        ]
+
+    def _inner(self, settings):
+        """
+        Return the permutation through the upper rotors and reflector (every
+        rotor but the first, and back again) for the given settings.
+        """
+        key = tuple(settings[1:])
+        inner = self._inners.get(key)
+        if inner is not None:
+            return inner
+
+        # Fold the upper rotors and reflector into a single permutation
+        inner = self.reflect
+        for i in range(len(settings) - 1, 0, -1):
+            setting = settings[i]
+            inner = self.forward[i][setting].translate(inner)
+            inner = inner.translate(self.reverse[i][setting])
+
+        if len(self._inners) >= self.cacheSize * self.size:
+            self._inners.clear()
+        self._inners[key] = inner
+        return inner
+
+    def _position(self, settings):
+        """Return the substitution table through the rotors at `settings`"""
+        setting = settings[0]
+        return self.forward[0][setting].translate(
+            self._inner(settings)
+        ).translate(self.reverse[0][setting])
+
+    def _block(self, settings):
+        """
+        Return the position tables for the given settings of the upper rotors;
+        one complete substitution table per setting of the first rotor.
+        """
+        key = tuple(settings[1:])
+        block = self._blocks.get(key)
+        if block is not None:
+            return block
+
+        # Wrap the inner permutation with the first rotor for every setting
+        inner = self._inner(settings)
+        block = [
+            self.forward[0][s].translate(inner).translate(self.reverse[0][s])
+            for s in range(self.size)
+        ]
+
+        # Keep the cache from growing without bound on large alphabets
+        if len(self._blocks) >= self.cacheSize:
+            self._blocks.clear()
+        self._blocks[key] = block
+        return block
+
+    def _carry(self):
+        """Carry a notch turnover from the first rotor up the stack."""
+        n = self.size
+        for i in range(1, len(self.settings)):
+            if not self.stepping[i]:
+                break
+            setting = self.settings[i] + 1
+            if setting == n:
+                setting = 0
+            self.settings[i] = setting
+            if not self.notches[i][setting]:
+                break
+
+    def stepCounts(self, settings, count):
+        """
+        Return how many times each rotor steps, and how many times each rotor
+        carries into the next one, over the next `count` pins from `settings`.
+        Worked out arithmetically from the notch positions.
+        """
+        n = self.size
+        steps = []
+        carries = []
+        carry = count
+        for i, setting in enumerate(settings):
+            if not self.stepping[i]:
+                carry = 0
+            steps.append(carry)
+
+            # Count how many of those steps landed this rotor on a notch
+            laps, rest = divmod(carry, n)
+            counts = self.turnovers[i]
+            carry = (
+                laps * counts[n] +
+                counts[setting + rest + 1] - counts[setting + 1]
+            )
+            carries.append(carry)
+
+        return steps, carries
+
+    def settingsAfter(self, settings, count):
+        """
+        Return the rotor settings `count` steps on from `settings`, worked out
+        arithmetically from the notch positions rather than by stepping.
+        """
+        steps, carries = self.stepCounts(settings, count)
+        return [
+            (setting + step) % self.size
+            for setting, step in zip(settings, steps)
+        ]
+
+    def advance(self, count):
+        """Advance the odometer by `count` pins in constant time"""
+        self.settings = self.settingsAfter(self.settings, count)
+        if self.cycle is not None:
+            self.position = (self.position + count) % self.period
+
+    def positions(self, settings, count):
+        """
+        Return the rotor-only substitution tables (plugboard excluded, padded
+        out to 256 entries) of the `count` positions starting at `settings`,
+        without moving the engine. The positions follow the same notch
+        carries as `step`.
+        """
+        saved = self.settings
+        self.settings = list(settings)
+        tables = []
+        if self.blocks and self.stepping[0]:
+            # Walk the first rotor, only changing blocks on a carry
+            n = self.size
+            notches = self.notches[0]
+            upper = len(settings) > 1
+            block = self._block(self.settings)
+            setting = self.settings[0]
+            for i in range(count):
+                tables.append(block[setting])
+                setting += 1
+                if setting == n:
+                    setting = 0
+                if notches[setting] and upper:
+                    self._carry()
+                    block = self._block(self.settings)
+        else:
+            for i in range(count):
+                tables.append(self._position(self.settings))
+                self.step()
+        self.settings = saved
+        return tables
+
+    def table(self, settings):
+        """
+        Return the complete substitution table (plugboard included) of the
+        machine at the given rotor settings.
+        """
+        table = self._position(settings)
+        return self.plugboard.translate(table).translate(self.plugboard)[
+            :self.size
+        ]
+
+    def compileCycle(self, limit=1 << 20):
+        """
+        Walk the odometer from the current settings until it comes back around,
+        recording the complete substitution table of every position on the way.
+        The stepping is a bijection on rotor settings, so the walk always
+        returns to its start. Returns the detected period.
+        """
+        n = self.size
+        start = list(self.settings)
+        states = []
+        tables = []
+        while True:
+            states.append(tuple(self.settings))
+            tables.append(self._position(self.settings)[:n])
+            self.step()
+            if self.settings == start:
+                break
+            if len(states) >= limit:
+                self.settings = start
+                raise ValueError(
+                    'Rotor period exceeds the cycle limit of ' + str(limit)
+                )
+
+        self.cycle = b''.join(tables)
+        self.cycleLimit = limit
+        self.cycleStates = states
+        self.cycleIndex = {state: i for i, state in enumerate(states)}
+        self.period = len(states)
+        self.position = 0
+        self._arrays = None
+        return self.period
+
+    def load(self, rotorStack):
+        """Pull the current rotor settings into the engine"""
+        for i, rotor in enumerate(rotorStack):
+            self.settings[i] = rotor.setting
+
+        # Locate the settings on the cycle, or compile the cycle they're on
+        if self.cycle is not None:
+            position = self.cycleIndex.get(tuple(self.settings))
+            if position is None:
+                self.compileCycle(self.cycleLimit)
+            else:
+                self.position = position
+
+    def store(self, rotorStack):
+        """Push the engine's rotor settings back out to the rotors"""
+        for i, rotor in enumerate(rotorStack):
+            rotor.setting = self.settings[i]
+
+    def step(self):
+        """Advance the odometer by one pin"""
+        if not self.stepping[0]:
+            return
+        setting = self.settings[0] + 1
+        if setting == self.size:
+            setting = 0
+        self.settings[0] = setting
+        if self.notches[0][setting]:
+            self._carry()
+
+    def translate(self, pins):
+        """
+        Translate a bytes-like sequence of pins, stepping the rotors after
+        each one exactly as the rotor chain would. Returns a bytearray of pins.
+        """
+        if self.cycle is not None:
+            return self._translateCycle(pins)
+
+        # A first rotor that never steps means the position never changes
+        if not self.stepping[0]:
+            table = self._position(self.settings)
+            return bytearray(bytes(pins).translate(table))
+
+        if not self.blocks:
+            return self._translateInner(pins)
+
+        block = self._block(self.settings)
+        setting = self.settings[0]
+        n = self.size
+        notches = self.notches[0]
+        upper = len(self.settings) > 1
+        table = block[setting]
+        pins_out = bytearray()
+        for pin in pins:
+            pins_out.append(table[pin])
+            setting += 1
+            if setting == n:
+                setting = 0
+            if notches[setting] and upper:
+                self._carry()
+                block = self._block(self.settings)
+            table = block[setting]
+
+        self.settings[0] = setting
+        return pins_out
+
+    def _translateInner(self, pins):
+        """Translate pins around the first rotor and the inner permutation"""
+        n = self.size
+        notches = self.notches[0]
+        forward = self.forward[0]
+        reverse = self.reverse[0]
+        inner = self._inner(self.settings)
+        setting = self.settings[0]
+        pins_out = bytearray()
+        for pin in pins:
+            pins_out.append(reverse[setting][inner[forward[setting][pin]]])
+            setting += 1
+            if setting == n:
+                setting = 0
+            if notches[setting]:
+                self._carry()
+                inner = self._inner(self.settings)
+
+        self.settings[0] = setting
+        return pins_out
+
+    def _translateCycle(self, pins):
+        """Translate pins by indexing straight into the full-period table"""
+        n = self.size
+        cycle = self.cycle
+        span = self.period * n
+        offset = self.position * n
+        pins_out = bytearray()
+        for pin in pins:
+            pins_out.append(cycle[offset + pin])
+            offset += n
+            if offset == span:
+                offset = 0
+
+        self.position = offset // n
+        self.settings = list(self.cycleStates[self.position])
+        return pins_out
+
+    def _numpy(self):
+        """Lazily build NumPy views of the compiled tables"""
+        if numpy is None:
+            raise ImportError(
+                'The NumPy backend requires numpy to be installed'
+            )
+
+        if self._arrays is None:
+            n = self.size
+
+            # Setting-major tables, flattened so a lookup is a single take()
+            def matrix(tables):
+                return numpy.frombuffer(
+                    b''.join(t[:n] for t in tables), dtype=numpy.uint8
+                )
+
+            self._arrays = {
+                'forward': [matrix(tables) for tables in self.forward],
+                'reverse': [matrix(tables) for tables in self.reverse],
+                'reflect': numpy.frombuffer(
+                    self.reflect[:n], dtype=numpy.uint8
+                ),
+                'notches': [
+                    numpy.frombuffer(notches, dtype=numpy.uint8).astype(bool)
+                    for notches in self.notches
+                ],
+                'cycle': None if self.cycle is None else numpy.frombuffer(
+                    self.cycle, dtype=numpy.uint8
+                ),
+                'blocks': None
+            }
+
+        return self._arrays
+
+    def _blockArray(self):
+        """
+        Lazily flatten the position tables of every setting of the upper rotors
+        into one array, so the table for any rotor position sits at offset
+        `(upper * n + first) * n`, where `upper` is the upper settings read as
+        a base-n number (second rotor least significant).
+        """
+        arrays = self._numpy()
+        if arrays['blocks'] is None:
+            n = self.size
+            upper = len(self.settings) - 1
+            tables = []
+            for index in range(n ** upper):
+                settings = [0]
+                for i in range(upper):
+                    index, setting = divmod(index, n)
+                    settings.append(setting)
+                tables += [table[:n] for table in self._block(settings)]
+            arrays['blocks'] = numpy.frombuffer(
+                b''.join(tables), dtype=numpy.uint8
+            )
+
+        return arrays['blocks']
+
+    def odometer(self, count, first=0):
+        """
+        Vectorized odometer. Returns one array per rotor holding that rotor's
+        setting at each of the `count` + 1 positions starting from the current
+        settings (the last entry being the settings after `count` steps).
+        With `first`, the odometer starts at that rotor, and each step is a
+        carry into it rather than a step of the first rotor.
+        """
+        arrays = self._numpy()
+        steps = numpy.zeros(count + 1, dtype=bool)
+        steps[1:] = True
+
+        columns = []
+        for i in range(first, len(self.settings)):
+            setting = self.settings[i]
+            # A rotor that doesn't step also stops the carry
+            if not self.stepping[i]:
+                steps[:] = False
+            column = numpy.cumsum(steps, dtype=numpy.intp)
+            column += setting
+            column %= self.size
+            columns.append(column)
+
+            # The next rotor steps wherever this one stepped onto a notch
+            steps = steps & arrays['notches'][i][column]
+
+        return columns
+
+    def translateArray(self, pins):
+        """
+        Translate a whole sequence of pins at once with NumPy, computing the
+        rotor position of every pin up front and substituting with fancy
+        indexing. Accepts a bytes-like object or uint8 array, returns a uint8
+        array of pins.
+        """
+        arrays = self._numpy()
+        n = self.size
+        pins = numpy.frombuffer(pins, dtype=numpy.uint8)
+        count = len(pins)
+
+        # Full-period table; positions are just a running index
+        if self.cycle is not None:
+            offsets = numpy.arange(count, dtype=numpy.intp)
+            offsets += self.position
+            offsets %= self.period
+            offsets *= n
+            offsets += pins
+            self.position = (self.position + count) % self.period
+            self.settings = list(self.cycleStates[self.position])
+            return arrays['cycle'].take(offsets)
+
+        if self.blocks and self.stepping[0]:
+            return self._translateBlocks(pins)
+
+        # Offset of each pin's table within the flattened rotor tables
+        columns = self.odometer(count)
+        offsets = [column[:count] * n for column in columns]
+
+        # Forward through the rotors
+        for i, offset in enumerate(offsets):
+            pins = arrays['forward'][i].take(offset + pins)
+
+        # Off the reflector and back again
+        pins = arrays['reflect'].take(pins)
+        for i in range(len(offsets) - 1, -1, -1):
+            pins = arrays['reverse'][i].take(offsets[i] + pins)
+
+        self.settings = [int(column[count]) for column in columns]
+        return pins
+
+    def _translateBlocks(self, pins):
+        """
+        Translate a uint8 array of pins with a single take() into the flattened
+        position tables. The first rotor's setting repeats every `n` pins, and
+        the upper rotors only move on a carry, so the upper settings are worked
+        out once per carry rather than once per pin.
+        """
+        blocks = self._blockArray()
+        n = self.size
+        count = len(pins)
+        if not count:
+            return pins.copy()
+
+        # Offset of each pin within its block, from the first rotor's setting.
+        # take() wants intp indices, so build them that way from the start.
+        setting = self.settings[0]
+        laps = count // n + 1
+        lap = numpy.roll(numpy.arange(n, dtype=numpy.intp), -setting)
+        index = numpy.tile(lap * n, laps)[:count]
+        index += pins
+
+        if len(self.settings) > 1:
+            # Steps after which the upper rotors carry, up to and including
+            # the last one; the first pin is translated before any step
+            notches = numpy.flatnonzero(
+                numpy.frombuffer(self.notches[0], dtype=numpy.uint8)[:n]
+            )
+            offsets = numpy.sort((notches - setting - 1) % n + 1)
+            carries = numpy.add.outer(
+                numpy.arange(laps, dtype=numpy.intp) * n, offsets
+            ).ravel()
+            carries = carries[carries <= count]
+
+            # Block offset of the upper settings after each number of carries
+            columns = self.odometer(len(carries), first=1)
+            upper = numpy.zeros(len(carries) + 1, dtype=numpy.intp)
+            for column in reversed(columns):
+                upper *= n
+                upper += column
+            upper *= n * n
+
+            # Spread each block offset over the pins it covers
+            inside = carries[carries < count]
+            runs = numpy.diff(inside, prepend=0, append=count)
+            index += numpy.repeat(upper[:len(runs)], runs)
+
+            self.settings[1:] = [int(column[-1]) for column in columns]
+
+        self.settings[0] = (setting + count) % n
+        return blocks.take(index)
+
+
+class Keystream:
+    """
+    Lazily evaluated sequence of whole-machine substitution tables, starting at
+    the rotor settings the engine had when the keystream was created. Any
+    position, or slice of positions, is computed directly without stepping
+    through the positions before it.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.settings = tuple(engine.settings)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.stop is None:
+                raise ValueError('Keystream slices need an upper bound')
+            if key.stop < 0 or (key.start or 0) < 0:
+                raise IndexError('Keystream positions cannot be negative')
+            return [self[i] for i in range(*key.indices(key.stop))]
+
+        if key < 0:
+            raise IndexError('Keystream positions cannot be negative')
+        return self.engine.table(self.engine.settingsAfter(self.settings, key))
@@ -0,0 +1,142 @@
+# stdlib imports
+
+# third party imports
+
+# local module imports
+
+
+class GroupFormatter:
+    """
+    Streaming output stage that splits translated letters into groups (the
+    classic pentagraphs by default), optionally wrapping a number of groups
+    per line. Where it left off is carried from one chunk to the next, so
+    chunks can be formatted one after another as they come.
+
+    Every group is followed by `separator`, or by `lineSeparator` when it
+    ends a line. With `groupsPerLine` at 0 there are no lines at all.
+    """
+
+    def __init__(
+            self,
+            groupSize=5,
+            groupsPerLine=0,
+            separator=b' ',
+            lineSeparator=b'\n'
+            ):
+        if groupSize < 1 or groupsPerLine < 0:
+            raise ValueError('Groups need at least one letter')
+        self.groupSize = groupSize
+        self.groupsPerLine = groupsPerLine
+        self.separator = bytes(separator)
+        self.lineSeparator = bytes(lineSeparator)
+
+        # Without lines, every group is a line of its own that just happens
+        # to end with the ordinary separator
+        if not groupsPerLine:
+            self._groups = 1
+            self._lineSeparator = self.separator
+        else:
+            self._groups = groupsPerLine
+            self._lineSeparator = self.lineSeparator
+        self._lineLetters = groupSize * self._groups
+
+        # Letters written into the current line so far
+        self.count = 0
+
+    def reset(self):
+        """Start over at the beginning of a group"""
+        self.count = 0
+
+    def skip(self, count):
+        """Move along as though `count` letters had been formatted"""
+        self.count = (self.count + count) % self._lineLetters
+
+    def size(self, count):
+        """Return the size of `count` letters once formatted"""
+        groups = (self.count + count) // self.groupSize - (
+            self.count // self.groupSize
+        )
+        lines = (self.count + count) // self._lineLetters
+        return (
+            count +
+            (groups - lines) * len(self.separator) +
+            lines * len(self._lineSeparator)
+        )
+
+    def format(self, letters):
+        """Format letters into a new bytearray"""
+        chunk_out = bytearray(self.size(len(letters)))
+        with memoryview(chunk_out) as view:
+            self.formatInto(letters, view)
+        return chunk_out
+
+    def formatInto(self, letters, view):
+        """
+        Format letters into `view`, which must be exactly `size(len(letters))`
+        bytes long. Whole lines are laid out column by column with strided
+        copies, so the cost doesn't grow with the number of groups.
+        """
+        count = len(letters)
+        position = 0
+        used = 0
+
+        # Finish the line left open by the last chunk
+        if self.count:
+            used, position = self._fill(
+                letters, view, used, position,
+                min(count, self._lineLetters - self.count)
+            )
+
+        # Lay out as many whole lines as there are, a column at a time
+        lines = (count - used) // self._lineLetters
+        if lines:
+            groupSize = self.groupSize
+            separator = self.separator
+            groupStride = groupSize + len(separator)
+            lineStride = (
+                self._groups * groupStride - len(separator) +
+                len(self._lineSeparator)
+            )
+            source = memoryview(letters)[used:used + lines * self._lineLetters]
+            body = view[position:position + lines * lineStride]
+            for group in range(self._groups):
+                offset = group * groupStride
+                for column in range(groupSize):
+                    body[offset + column::lineStride] = source[
+                        group * groupSize + column::self._lineLetters
+                    ]
+
+                # Then the separator after the group, byte by byte
+                if group < self._groups - 1:
+                    ending = separator
+                else:
+                    ending = self._lineSeparator
+                for i, byte in enumerate(ending):
+                    body[offset + groupSize + i::lineStride] = (
+                        bytes((byte,)) * lines
+                    )
+            used += lines * self._lineLetters
+            position += lines * lineStride
+
+        # And whatever is left over starts a new line
+        self._fill(letters, view, used, position, count)
+
+    def _fill(self, letters, view, used, position, stop):
+        """Write letters up to `stop` group by group, returning the new spot"""
+        groupSize = self.groupSize
+        while used < stop:
+            take = min(groupSize - self.count % groupSize, stop - used)
+            view[position:position + take] = letters[used:used + take]
+            position += take
+            used += take
+            self.count += take
+
+            # Close off a finished group, or a finished line
+            if not self.count % groupSize:
+                ending = self.separator
+                if self.count == self._lineLetters:
+                    ending = self._lineSeparator
+                    self.count = 0
+                view[position:position + len(ending)] = ending
+                position += len(ending)
+        return used, position
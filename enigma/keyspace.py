@@ -0,0 +1,177 @@
+# stdlib imports
+import itertools
+
+# third party imports
+
+# local module imports
+import enigma.machine as emachine
+import enigma.rotors as rotors
+
+
+class Keyspace:
+    """
+    Lazily enumerated space of machine configurations; every order of
+    `slots` rotors drawn from `rotorNames` (the Enigma I rotors by default),
+    with each of `reflectorNames` (UKW B by default), each of `plugboards`
+    (lists of pairs, unplugged by default), and every start position. With
+    `notches` true, every single-notch position of every rotor but the last
+    (whose notch never carries into anything) is tried as well.
+
+    Iterating doesn't build a machine per candidate. It yields one machine,
+    reconfigured in place for each candidate, with its default break point
+    set to the candidate's start. It's only good until the next candidate;
+    keep one with `Machine(state=machine.stateGet())`. Any other keyword
+    arguments are passed along to that machine (ex; `outputMode`).
+
+    Candidates are numbered with the reflector outermost, then the rotor
+    order, notches, plugboard, and start positions innermost, so most
+    candidates only turn the rotors. `iterate` can walk just one shard of
+    them, to share a sweep out evenly between worker processes.
+    """
+
+    def __init__(
+            self,
+            rotorNames=None,
+            reflectorNames=None,
+            slots=3,
+            notches=False,
+            plugboards=None,
+            **options
+            ):
+        if rotorNames is None:
+            rotorNames = rotors.families()['Enigma I'][0]
+        if reflectorNames is None:
+            reflectorNames = ['1b']
+
+        # Everything has to share one alphabet
+        sizes = set()
+        for name in rotorNames:
+            if name not in rotors.ROTORS:
+                raise ValueError(name + ' is not a valid rotor short-name')
+            sizes.add(len(rotors.ROTORS[name]._abet))
+        for name in reflectorNames:
+            if name not in rotors.REFLECTORS:
+                raise ValueError(name + ' is not a valid reflector short-name')
+            sizes.add(len(rotors.REFLECTORS[name]._abet))
+        if len(sizes) != 1:
+            raise ValueError(
+                'The rotors and reflectors use different alphabets'
+            )
+        if not 0 < slots <= len(rotorNames):
+            raise ValueError(
+                'Cannot fill ' + str(slots) + ' slots from ' +
+                str(len(rotorNames)) + ' rotors'
+            )
+
+        self.size = sizes.pop()
+        self.slots = slots
+        self.orders = list(itertools.permutations(rotorNames, slots))
+        self.reflectorNames = list(reflectorNames)
+        self.notches = notches
+        self.plugboards = [list(p) for p in plugboards] if plugboards else [[]]
+        self.options = options
+
+        # Number of choices at each level of the enumeration
+        self.positions = self.size ** slots
+        self.notchChoices = self.size ** (slots - 1) if notches else 1
+
+    def __len__(self):
+        return (
+            len(self.reflectorNames) * len(self.orders) * self.notchChoices *
+            len(self.plugboards) * self.positions
+        )
+
+    def __iter__(self):
+        return self.iterate()
+
+    def shard(self, index, count):
+        '''
+        Return the (begin, end) range of the candidates in shard `index` of
+        `count`. Shards are contiguous and differ in size by one at most.
+        '''
+        if not 0 <= index < count:
+            raise ValueError(
+                'No shard ' + str(index) + ' of ' + str(count) + ' shards'
+            )
+        total = len(self)
+        return total * index // count, total * (index + 1) // count
+
+    def iterate(self, shard=0, shards=1):
+        '''Walk the candidates of shard `shard` of `shards` (all by default)'''
+        return self._walk(*self.shard(shard, shards))
+
+    def machine(self, index):
+        '''Build a machine of its own, set up as candidate `index`'''
+        if not 0 <= index < len(self):
+            raise IndexError('No candidate ' + str(index))
+        return next(self._walk(index, index + 1))
+
+    def _walk(self, begin, end):
+        '''Walk the candidates numbered `begin` up to `end`'''
+        if begin >= end:
+            return
+
+        # The one machine, and one instance of each rotor and reflector
+        reflector, order = self._decode(begin)[:2]
+        machine = emachine.Machine(
+            rotorStack=list(order),
+            reflector=reflector,
+            **self.options
+        )
+        instances = {rotor._short: rotor for rotor in machine.rotors}
+        instances[reflector] = machine.reflector
+
+        # Single-notch tables are built up front
+        notchTables = [
+            bytes(int(i == notch) for i in range(self.size))
+            for notch in range(self.size)
+        ]
+
+        index = begin
+        while index < end:
+            # Reconfigure the machine for the next run of start positions
+            reflector, order, notch, plugboard = self._decode(index)
+            stack = []
+            for name in order:
+                if name not in instances:
+                    instances[name] = rotors.stringToRotor(name)
+                rotor = instances[name]
+                rotor.notches = type(rotor)._defaultNotches
+                stack.append(rotor)
+            if self.notches:
+                for rotor in stack[:-1]:
+                    notch, choice = divmod(notch, self.size)
+                    rotor.notches = notchTables[choice]
+            if reflector not in instances:
+                instances[reflector] = rotors.stringToReflector(reflector)
+
+            machine.reconfigure(
+                plugboardStack=self.plugboards[plugboard],
+                rotorStack=stack,
+                reflector=instances[reflector]
+            )
+
+            # Then just turn the rotors
+            first = index % self.positions
+            last = min(self.positions, first + end - index)
+            starts = itertools.islice(
+                itertools.product(range(self.size), repeat=self.slots),
+                first, last
+            )
+            for start in starts:
+                machine.reconfigure(settings=start)
+                if machine.formatter:
+                    machine.formatter.reset()
+                yield machine
+            index += last - first
+
+    def _decode(self, index):
+        '''Split a candidate number into reflector, order, notch, plugboard'''
+        config = index // self.positions
+        config, plugboard = divmod(config, len(self.plugboards))
+        config, notch = divmod(config, self.notchChoices)
+        reflector, order = divmod(config, len(self.orders))
+        return (
+            self.reflectorNames[reflector], self.orders[order], notch,
+            plugboard
+        )
@@ -1,21 +1,122 @@
 # stdlib imports
 import array
+import asyncio
+import collections
+import concurrent.futures
 import enum
 import io
-import pickle
+import json
+import mmap
+import os
 import random
+import re
+import time
 
 # third party imports
 
 # local module imports
+import enigma.engine as engine
+import enigma.formatting as formatting
 import enigma.rotors as rotors
 
 
+# Classic mode translation tables. Letters of either case map onto their pin,
+# everything else is deleted, and pins map back onto capital letters.
+_LETTERS = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+_CLASSIC_DELETE = bytes(b for b in range(256) if b not in _LETTERS)
+_CLASSIC_PINS = bytes.maketrans(_LETTERS, bytes(range(26)) * 2)
+_CLASSIC_LETTERS = bytes.maketrans(bytes(range(26)), _LETTERS[:26])
+
+# Runs of characters that modern mode passes straight through
+_PASSTHROUGH = re.compile(b'[^A-Za-z]+')
+
+
+# Version of the serialized state format written by `Machine.stateGet`
+STATE_VERSION = 1
+
+# Machines built by parallel workers, keyed by serialized state
+_workerMachines = {}
+
+
+def _translateSegment(state, options, settings, pentacount, segment):
+    '''Translate one segment of a parallel stream in a worker process'''
+    machine = _workerMachines.get(state)
+    if machine is None:
+        machine = Machine(state=state, **options)
+        _workerMachines.clear()
+        _workerMachines[state] = machine
+
+    # Pick up exactly where the previous segment will have left off
+    for rotor, setting in zip(machine.rotors, settings):
+        rotor.setting = setting
+    machine.pentacount = pentacount
+
+    return machine.translateChunk(segment)
+
+
+def _plug(plugboard, x, y):
+    '''Swap two unplugged pins of a plugboard, refusing to reuse a pin'''
+    if x == y or plugboard[x] != x or plugboard[y] != y:
+        raise ValueError('Plugboard pair ' + repr([x, y]) + ' reuses a pin')
+    plugboard[x] = y
+    plugboard[y] = x
+
+
+class _ChunkSizer:
+    '''
+    Adaptive chunk size for streams. Starting from `size`, the chunk size
+    doubles for as long as that keeps buying at least `gain` times the
+    throughput, and settles as soon as it stops paying off or reaches `limit`.
+    Each size is measured over at least `window` seconds.
+    '''
+
+    def __init__(self, size=1 << 12, limit=1 << 20, gain=1.1, window=0.05):
+        self.size = min(size, limit)
+        self.limit = limit
+        self.gain = gain
+        self.window = window
+        self.settled = False
+        self._best = 0.0
+        self._bytes = 0
+        self._seconds = 0.0
+
+    def record(self, size, seconds):
+        """Record how long it took to read, translate and write a chunk"""
+        self._bytes += size
+        self._seconds += seconds
+        if self._seconds < self.window:
+            return
+
+        rate = self._bytes / self._seconds
+        self._bytes = 0
+        self._seconds = 0.0
+        if rate < self._best * self.gain:
+            # Growing didn't pay off, so go back to the last size that did
+            self.size //= 2
+            self.settled = True
+        elif self.size >= self.limit:
+            self.settled = True
+        else:
+            self._best = rate
+            self.size = min(self.size * 2, self.limit)
+
+
+class MODE(enum.Enum):
+    CLASSIC = 1
+    MODERN = 2
+    BYTE = 3
+
+
 class OUTPUT(enum.Enum):
     PENTAGRAPH = 1
     CONTINUOUS = 2
 
 
+class BACKEND(enum.Enum):
+    PYTHON = 1
+    NUMPY = 2
+
+
 class Machine:
     def __init__(
             self,
@@ -24,16 +125,50 @@ class Machine:
             reflector=None,
             state=None,
             stateSeed='',
-            outputMode=OUTPUT.PENTAGRAPH
+            outputMode=OUTPUT.PENTAGRAPH,
+            cycle=False,
+            backend=BACKEND.PYTHON,
+            machineMode=MODE.CLASSIC,
+            stats=False,
+            formatter=None
             ):
         """Initialize a new Enigma Machine.
+
+        `machineMode` decides what gets translated. MODE.CLASSIC only
+        processes the letters A through Z (capitalizing lowercase ones and
+        dropping everything else). MODE.MODERN preserves case, and passes
+        everything else through unchanged without stepping the rotors.
+        MODE.BYTE processes every byte and requires byte-compatible rotors
+        and reflectors. Modern and byte mode output is never split into
+        pentagraphs.
+
+        Classic mode output goes through `formatter` (ex; a
+        `formatting.GroupFormatter` with a different group size, or lines of
+        groups) when one is given. Otherwise OUTPUT.PENTAGRAPH splits it into
+        groups of five, and OUTPUT.CONTINUOUS leaves it as it is.
+
+        If `cycle` is true, the full period of rotor positions is precomputed
+        the first time the machine translates anything (see `cycleCompile`).
+        `backend` picks how chunks are translated; BACKEND.NUMPY processes a
+        whole chunk at once with vectorized operations (requires numpy).
+
+        If `stats` is true, translation is instrumented (see `stats`).
         """
         # Initialize the empty variables
         self.plugboard = []
         self.rotors = []
         self.reflector = None
+        self._engine = None
+        self._fingerprint = None
+        self._cycle = cycle
+        self.machineMode = machineMode
+        self._breakpoints = {}
+        self._stats = None
 
-        self.pentacount = 0
+        # Output formatting stage for classic mode
+        if formatter is None and outputMode == OUTPUT.PENTAGRAPH:
+            formatter = formatting.GroupFormatter()
+        self.formatter = formatter
 
         # Unpack the state
         if state:
@@ -55,25 +190,53 @@ class Machine:
         # Go ahead and set a break point
         self.breakSet()
 
-        # Store the mode
-        self.mode = outputMode
+        # Store the mode and backend
+        self._mode = outputMode
+        self.backend = backend
+        if backend == BACKEND.NUMPY and engine.numpy is None:
+            raise ImportError(
+                'The NumPy backend requires numpy to be installed'
+            )
+
+        if stats:
+            self.statsEnable()
 
     def _initPlugboard(self, stack):
         '''Initialize the plugboard translation matrix'''
+        self._invalidate()
+
         # Start with an 1:1 mapping
-        self.plugboard = array.array('b', [i for i in range(26)])
+        size = 256 if self.machineMode == MODE.BYTE else 26
+        self.plugboard = array.array('B', [i for i in range(size)])
 
-        # Swap up the mappings for each desired pair
+        # Swap up the mappings for each desired pair. Byte mode also takes
+        # pairs as four hex digits (ex; 01EE), the way --state-print shows
+        # them, since most bytes can't be typed.
         for pair in stack:
+            if self.machineMode == MODE.BYTE and isinstance(pair, str) and \
+                    len(pair) == 4:
+                try:
+                    pair = bytes.fromhex(pair)
+                except ValueError:
+                    raise ValueError(pair + ' is not a valid hex pairing')
+            if len(pair) != 2:
+                raise ValueError(
+                    repr(pair) + ' is not a valid plugboard pairing'
+                )
             x = pair[0]
             y = pair[1]
-            x = rotors._RotorBase._abet.index(x.upper())
-            y = rotors._RotorBase._abet.index(y.upper())
-            self.plugboard[x] = y
-            self.plugboard[y] = x
+            if self.machineMode == MODE.BYTE:
+                x = rotors._BYTES.index(x if isinstance(x, int) else ord(x))
+                y = rotors._BYTES.index(y if isinstance(y, int) else ord(y))
+            else:
+                x = rotors._RotorBase._abet.index(x.upper())
+                y = rotors._RotorBase._abet.index(y.upper())
+            _plug(self.plugboard, x, y)
 
     def _initRotors(self, stack):
         '''Check the passed rotors to see if they're strings or real rotors'''
+        self._invalidate()
+
         for i, entry in enumerate(stack):
 
             rotor = None
@@ -97,6 +260,8 @@ class Machine:
 
     def _initReflector(self, reflector):
         '''Check to make sure a real reflector was passed in'''
+        self._invalidate()
+
         # if it's an actual reflector instance, keep on swimming
         if isinstance(reflector, rotors._ReflectorBase):
             self.reflector = reflector
@@ -111,13 +276,19 @@ class Machine:
                 'Unknown type of reflector passed into the machine'
             )
 
+    def _invalidate(self):
+        '''Drop everything compiled from the current configuration'''
+        self._engine = None
+        self._fingerprint = None
+
     def _link(self):
         """Link the rotors and reflectors together in a node-like fashion"""
         # Link the rotors forward
         for i in range(len(self.rotors))[:-1]:
             self.rotors[i].next = self.rotors[i + 1]
 
-        # Link the rotors backwards
+        # Link the rotors backwards (rotors can be relinked in a new order)
+        self.rotors[0].previous = None
         for i in range(len(self.rotors))[1:]:
             self.rotors[i].previous = self.rotors[i - 1]
 
@@ -125,84 +296,294 @@ class Machine:
         self.rotors[-1].next = self.reflector
         self.reflector.previous = self.rotors[-1]
 
-    def _checkByte(self, b):
-        '''Sanitize a single character'''
-        # Uppercase alpha. Good to go.
-        if b >= 65 and b <= 90:
-            return b
+        # Everything in the loop has to share the mode's alphabet size
+        size = len(self.plugboard)
+        for rotor in self.rotors + [self.reflector]:
+            if len(rotor._abet) != size:
+                raise ValueError(
+                    rotor._name + ' does not have the ' + str(size) +
+                    '-symbol alphabet required by ' + str(self.machineMode)
+                )
 
-        # Lowercase alpha. Let's capitalize it.
-        elif b >= 97 and b <= 122:
-                return b - 32
+    def _compile(self):
+        """Return the compiled engine, rebuilding it if it was invalidated"""
+        if self._engine is None:
+            self._engine = engine.Engine(
+                self.plugboard,
+                self.rotors,
+                self.reflector
+            )
+            if self._cycle:
+                self._engine.compileCycle()
 
-        # Invalid character.
-        else:
-            return False
+            # Fold the plugboard into the sanitizing translation tables
+            if self.machineMode == MODE.BYTE:
+                self._plugboardIn = self._engine.plugboard
+                self._plugboardOut = self._engine.plugboard
+                self._delete = b''
+            else:
+                self._plugboardIn = _CLASSIC_PINS.translate(
+                    self._engine.plugboard
+                )
+                self._plugboardOut = self._engine.plugboard.translate(
+                    _CLASSIC_LETTERS
+                )
+                self._delete = _CLASSIC_DELETE
+        return self._engine
+
+    def cycleCompile(self):
+        """
+        Precompute the full cycle of whole-machine substitution tables for the
+        current rotor settings, so translation becomes pure table indexing.
+        Returns the detected period.
+        """
+        self._cycle = True
+        compiled = self._compile()
+        compiled.load(self.rotors)
+        if compiled.cycle is None:
+            compiled.compileCycle()
+        return compiled.period
+
+    def cyclePeriod(self):
+        """Return the period of the compiled cycle, or None if not compiled"""
+        if self._engine is None:
+            return None
+        return self._engine.period
+
+    def stateFingerprint(self):
+        """
+        Return a compact, hashable fingerprint of everything about the machine
+        except its rotor settings (plugboard, rotor types, notches, and the
+        reflector).
+        """
+        return (
+            bytes(self.plugboard),
+            tuple(
+                (rotor._short, bytes(rotor.notches)) for rotor in self.rotors
+            ),
+            (self.reflector._short, self.reflector.setting)
+        )
 
     def stateGet(self):
         '''Get a serialized state of the machine. (the 'settings')'''
-        return pickle.dumps((
-            self.plugboard,
-            self.rotors,
-            self.reflector
-        ), -1)
+        return json.dumps({
+            'version': STATE_VERSION,
+            'config': {
+                'size': len(self.plugboard),
+                'plugboard': [
+                    [x, y] for x, y in enumerate(self.plugboard) if x < y
+                ],
+                'rotors': [{
+                    'name': rotor._short,
+                    'notches': [i for i, n in enumerate(rotor.notches) if n]
+                } for rotor in self.rotors],
+                'reflector': {
+                    'name': self.reflector._short,
+                    'setting': self.reflector.setting
+                }
+            },
+            'positions': [rotor.setting for rotor in self.rotors]
+        }, sort_keys=True, separators=(',', ':')).encode()
 
     def stateSet(self, state):
         '''Set the state of the machine from a serialized input'''
-        (
-            self.plugboard,
-            self.rotors,
-            self.reflector
-        ) = pickle.loads(state)
+        try:
+            state = json.loads(state)
+            version = state['version']
+        except (ValueError, TypeError, KeyError):
+            raise ValueError(
+                'Not a valid state (pickled states are no longer supported, '
+                'recreate them with --state-create)'
+            )
+        if version != STATE_VERSION:
+            raise ValueError('Unsupported state version ' + str(version))
+
+        size = 256 if self.machineMode == MODE.BYTE else 26
+
+        def symbol(value, what):
+            """Check that a stored pin lies within the alphabet"""
+            if type(value) is not int or not 0 <= value < size:
+                raise ValueError('Invalid ' + what + ' ' + repr(value))
+            return value
+
+        try:
+            config = state['config']
+            if config['size'] != size:
+                raise ValueError(
+                    'State is for a ' + str(config['size']) + '-symbol ' +
+                    'alphabet, but ' + str(self.machineMode) + ' needs ' +
+                    str(size)
+                )
+
+            # Rebuild the plugboard from its swapped pairs
+            plugboard = array.array('B', range(size))
+            for x, y in config['plugboard']:
+                x = symbol(x, 'plugboard entry')
+                y = symbol(y, 'plugboard entry')
+                _plug(plugboard, x, y)
+
+            # Rebuild the rotors, then put them back in position
+            if not config['rotors']:
+                raise ValueError('State has no rotors')
+            if len(state['positions']) != len(config['rotors']):
+                raise ValueError(
+                    'State has ' + str(len(state['positions'])) +
+                    ' rotor positions for ' + str(len(config['rotors'])) +
+                    ' rotors'
+                )
+            stack = []
+            for entry, setting in zip(config['rotors'], state['positions']):
+                rotor = rotors.stringToRotor(entry['name'])
+                rotor.setting = symbol(setting, 'rotor setting')
+                notches = bytearray(size)
+                for notch in entry['notches']:
+                    notches[symbol(notch, 'notch')] = 1
+                rotor.notches = bytes(notches)
+                stack.append(rotor)
+
+            reflector = rotors.stringToReflector(config['reflector']['name'])
+            reflector.setting = symbol(
+                config['reflector']['setting'], 'reflector setting'
+            )
+
+        except (KeyError, TypeError, IndexError, OverflowError) as error:
+            raise ValueError('Malformed state: ' + repr(error))
+
+        self.plugboard = plugboard
+        self.rotors = stack
+        self.reflector = reflector
+        self._invalidate()
+        self._link()
 
     def stateRandom(self, seed):
         """Randomly generate a state from a string seed"""
         # Seed the random generator
         random.seed(seed)
 
+        # Candidate symbols, rotors, and reflectors for the machine's alphabet
+        size = 256 if self.machineMode == MODE.BYTE else 26
+        symbols = rotors._BYTES if size == 256 else rotors._RotorBase._abet
+        rotorNames = rotors.rotorNames(size)
+        reflNames = rotors.reflectorNames(size)
+
         # Generate a random plugboard
         plugboardStack = []
-        abet = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-        for i in range(random.randint(0, 13)):
-            pair = ''
+        abet = list(symbols)
+        for i in range(random.randint(0, size // 2)):
+            pair = []
             for j in range(2):
                 k = random.randrange(0, len(abet))
-                pair += abet[k]
+                pair.append(abet[k])
                 del abet[k]
             plugboardStack.append(pair)
         self._initPlugboard(plugboardStack)
 
         # Generate random rotors (there will always be three)
         rotorStack = []
-        abet = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-        rotorNames = sorted(
-            [r._short for r in rotors._RotorBase.__subclasses__()]
-        )
-        rotorNames.remove('base-ref')
         for i in range(3):
-            rotor = '{0}:{1}:{2}'.format(
-                random.choice(rotorNames),
-                random.choice(abet),
-                random.choice(abet)
-            )
+            rotor = rotors.stringToRotor(random.choice(rotorNames))
+            rotor.setting = random.randrange(size)
+            notch = random.randrange(size)
+            rotor.notches = bytes(int(j == notch) for j in range(size))
             rotorStack.append(rotor)
         self._initRotors(rotorStack)
 
         # Pick a random reflector
-        reflNames = sorted(
-            [r._short for r in rotors._ReflectorBase.__subclasses__()]
-        )
         reflector = random.choice(reflNames)
         self._initReflector(reflector)
 
-    def breakSet(self):
-        '''Save the current state to be easily returned to later'''
-        self._breakstate = self.stateGet()
+    def reconfigure(
+            self,
+            plugboardStack=None,
+            rotorStack=None,
+            reflector=None,
+            settings=None
+            ):
+        '''
+        Reconfigure the machine in place. Any of the plugboard, rotors, and
+        reflector that are given replace the current ones (in the same forms
+        the constructor takes), and everything compiled from the old ones is
+        dropped. Called with nothing at all, it just drops what was compiled,
+        to pick up notches changed on the rotors themselves.
+
+        With `settings`, the rotors are then turned to those settings and the
+        default break point is set there. Called with only `settings`, it's
+        cheap enough to call for every start position in a sweep; the
+        machine's fingerprint is only worked out again after a
+        reconfiguration.
+        '''
+        if settings is None or plugboardStack is not None or \
+                rotorStack is not None or reflector is not None:
+            if plugboardStack is not None:
+                self._initPlugboard(plugboardStack)
+            if rotorStack is not None:
+                self.rotors = []
+                self._initRotors(rotorStack)
+            if reflector is not None:
+                self.reflector = None
+                self._initReflector(reflector)
+            self._invalidate()
+            self._link()
+
+        if settings is not None:
+            for rotor, setting in zip(self.rotors, settings):
+                rotor.setting = setting
+            if self._fingerprint is None:
+                self._fingerprint = self.stateFingerprint()
+            self._breakpoints[None] = (self._fingerprint, tuple(settings))
+
+    def breakSet(self, name=None):
+        '''
+        Save the current rotor settings to be easily returned to later. Any
+        number of break points can be kept by giving them names.
+        '''
+        self._breakpoints[name] = (
+            self.stateFingerprint(),
+            tuple(rotor.setting for rotor in self.rotors)
+        )
+
+    def breakGo(self, name=None):
+        '''Return to a saved break point'''
+        if name not in self._breakpoints:
+            raise ValueError('No break point named ' + repr(name))
+        fingerprint, settings = self._breakpoints[name]
+        if fingerprint != self.stateFingerprint():
+            raise ValueError(
+                'The machine has been reconfigured since break point ' +
+                repr(name) + ' was set'
+            )
+        for rotor, setting in zip(self.rotors, settings):
+            rotor.setting = setting
+
+    def breakClear(self, name=None):
+        '''Forget a saved break point'''
+        self._breakpoints.pop(name, None)
+
+    def advance(self, count):
+        """
+        Move the rotors forward by `count` characters without translating
+        anything. Takes the same time no matter how large `count` is.
+        """
+        compiled = self._compile()
+        compiled.load(self.rotors)
+        compiled.advance(count)
+        compiled.store(self.rotors)
+
+    def seek(self, position, name=None):
+        """Set the rotors to `position` characters past a break point"""
+        self.breakGo(name)
+        self.advance(position)
 
-    def breakGo(self):
-        '''Return to the saved break state'''
-        assert hasattr(self, '_breakstate')
-        self.stateSet(self._breakstate)
+    def keystream(self):
+        """
+        Return a lazy keystream starting at the current rotor settings. Each
+        item is the complete substitution table (as pins) of that position, and
+        arbitrary positions or slices can be looked up directly, e.g.
+        `machine.keystream()[10**9:10**9 + 64]`.
+        """
+        compiled = self._compile()
+        compiled.load(self.rotors)
+        return engine.Keystream(compiled)
 
     def translatePin(self, pin):
         """
@@ -231,37 +612,252 @@ class Machine:
         """
         Translate a non-empty bytes or bytearray object through the machine.
         """
-        # Initialize the outgoing chunk
-        chunk_out = bytearray()
+        start = time.perf_counter() if self._stats is not None else None
+        chunk_in, letters_in, pins, size = self._sanitize(chunk_in)
+        chunk_out = bytearray(size)
+        with memoryview(chunk_out) as view:
+            self._translatePins(chunk_in, letters_in, pins, view, start)
+        return chunk_out
+
+    def translateInto(self, src, dst):
+        """
+        Translate any buffer (bytes, bytearray, memoryview, mmap, array...)
+        straight into the writable buffer `dst`, returning the number of bytes
+        written to the start of it. Raises ValueError, before the rotors
+        move, if `dst` is smaller than `outputSize(src)`.
+        """
+        start = time.perf_counter() if self._stats is not None else None
+        src, letters_in, pins, size = self._sanitize(src)
+        with memoryview(dst) as base, base.cast('B') as view:
+            if view.readonly:
+                raise TypeError('Cannot translate into a read-only buffer')
+            if len(view) < size:
+                raise ValueError(
+                    'Output buffer holds {0} bytes, but {1} are needed'.format(
+                        len(view), size
+                    )
+                )
+            self._translatePins(src, letters_in, pins, view[:size], start)
+        return size
+
+    def outputSize(self, src):
+        """Return how many bytes translating `src` would produce right now"""
+        with memoryview(src) as view:
+            size = view.nbytes
+        if self.machineMode == MODE.CLASSIC:
+            return self._formattedSize(self._stepCount(src))
+        return size
+
+    def _sanitize(self, chunk_in):
+        """
+        Capitalize, drop invalid characters, and run a chunk through the
+        plugboard. Returns the chunk as bytes, its letters (in modern mode),
+        the pins to translate, and the size of the output they will make.
+        """
+        if not isinstance(chunk_in, (bytes, bytearray)):
+            chunk_in = bytes(memoryview(chunk_in))
 
-        # Text modes
-        for byte_in in chunk_in:
-            # Check the byte
-            byte_out = self._checkByte(byte_in)
-            if not byte_out:
-                continue
+        self._compile()
+        letters_in = None
+        if self.machineMode == MODE.MODERN:
+            letters_in = chunk_in.translate(None, self._delete)
+            pins = letters_in.translate(self._plugboardIn)
+        else:
+            pins = chunk_in.translate(self._plugboardIn, self._delete)
 
-            # Convert the byte to a pin
-            byte_out -= 65
+        size = len(chunk_in)
+        if self.machineMode == MODE.CLASSIC:
+            size = self._formattedSize(len(pins))
+        return chunk_in, letters_in, pins, size
 
-            # Run it through the machine
-            byte_out = self.translatePin(byte_out)
+    def _translatePins(self, chunk_in, letters_in, pins, view, start):
+        """
+        Run sanitized pins through the rotors and write the formatted output
+        into `view`, which must be exactly the right size.
+        """
+        stats = self._stats
+        if stats is not None:
+            sanitized = time.perf_counter()
 
-            # Convert it back into a byte
-            byte_out += 65
+        # Run the pins through the compiled rotors
+        compiled = self._compile()
+        compiled.load(self.rotors)
+        if stats is not None:
+            settings = list(compiled.settings)
+        if self.backend == BACKEND.NUMPY:
+            pins = compiled.translateArray(pins).tobytes()
+        else:
+            pins = compiled.translate(pins)
+        compiled.store(self.rotors)
+        if stats is not None:
+            rotated = time.perf_counter()
 
-            # Append it to the array
-            chunk_out.append(byte_out)
+        # Back through the plugboard and into letters
+        letters = pins.translate(self._plugboardOut)
 
-            # If pentagraph mode is on, increment and Check
-            if self.mode == OUTPUT.PENTAGRAPH:
-                self.pentacount += 1
-                if self.pentacount == 5:
-                    chunk_out.append(0x20)
-                    self.pentacount = 0
+        # Write out the processed chunk
+        if self.machineMode == MODE.MODERN:
+            self._passthrough(chunk_in, letters_in, letters, view)
+        elif self.machineMode == MODE.CLASSIC and self.formatter:
+            self.formatter.formatInto(letters, view)
+        else:
+            view[:] = letters
 
-        # Return the processed chunk
-        return chunk_out
+        if stats is not None:
+            self._statsCount(len(chunk_in), len(pins), settings)
+            times = stats['time']
+            times['sanitize'] += sanitized - start
+            times['rotors'] += rotated - sanitized
+            times['output'] += time.perf_counter() - rotated
+
+    def _passthrough(self, chunk_in, letters_in, letters_out, view):
+        """
+        Put translated letters back into their original case and positions,
+        copying the runs of untranslated characters in between as-is.
+        """
+        if not letters_out:
+            view[:] = chunk_in
+            return
+
+        # Lowercase letters differ from capitals only by the 0x20 bit, so the
+        # case of the whole chunk can be carried over with one big-int OR
+        size = len(letters_out)
+        case = int.from_bytes(letters_in, 'big') & int.from_bytes(
+            b'\x20' * size, 'big'
+        )
+        letters_out = (int.from_bytes(letters_out, 'big') | case).to_bytes(
+            size, 'big'
+        )
+
+        position = 0
+        used = 0
+        for run in _PASSTHROUGH.finditer(chunk_in):
+            start, end = run.span()
+            view[position:start] = letters_out[used:used + start - position]
+            view[start:end] = chunk_in[start:end]
+            used += start - position
+            position = end
+        view[position:] = letters_out[used:]
+
+    def statsEnable(self, enabled=True):
+        """Turn instrumentation on (starting from zero) or off"""
+        self._stats = None
+        if enabled:
+            self._stats = {
+                'chunks': 0,
+                'characters': 0,
+                'translated': 0,
+                'dropped': 0,
+                'passedThrough': 0,
+                'rotorSteps': [0] * len(self.rotors),
+                'turnovers': [0] * len(self.rotors),
+                'time': {
+                    'read': 0.0,
+                    'sanitize': 0.0,
+                    'rotors': 0.0,
+                    'output': 0.0,
+                    'write': 0.0
+                }
+            }
+
+    def stats(self):
+        """
+        Return a snapshot of the instrumentation counters, or None if they
+        are disabled. Counters cover;
+
+        - chunks, characters: chunks and characters fed in to be translated
+        - translated: characters that went through the rotors
+        - dropped: characters thrown out by classic mode
+        - passedThrough: characters passed through untouched by modern mode
+        - rotorSteps: how many times each rotor stepped
+        - turnovers: how many times each rotor's notch carried it into the
+          next rotor (the odometer never double steps, so that is every
+          movement of the rotors above the first)
+        - time: seconds spent reading and writing streams, sanitizing input,
+          in the rotors, and formatting output
+
+        Rotor movement is worked out arithmetically once per chunk, and
+        nothing is counted or timed while disabled. Segments translated by
+        parallel workers are counted, but their time isn't.
+        """
+        if self._stats is None:
+            return None
+        stats = dict(self._stats)
+        stats['rotorSteps'] = list(stats['rotorSteps'])
+        stats['turnovers'] = list(stats['turnovers'])
+        stats['time'] = dict(stats['time'])
+        return stats
+
+    def _statsCount(self, characters, translated, settings):
+        """Count a chunk's characters and the rotor movement they caused"""
+        stats = self._stats
+        stats['chunks'] += 1
+        stats['characters'] += characters
+        stats['translated'] += translated
+        if self.machineMode == MODE.CLASSIC:
+            stats['dropped'] += characters - translated
+        elif self.machineMode == MODE.MODERN:
+            stats['passedThrough'] += characters - translated
+
+        steps, carries = self._compile().stepCounts(settings, translated)
+        for key, counts in (('rotorSteps', steps), ('turnovers', carries)):
+            totals = stats[key]
+            totals.extend([0] * (len(counts) - len(totals)))
+            for i, count in enumerate(counts):
+                totals[i] += count
+
+    def _timed(self, function, phase):
+        """Wrap a function to time it under `phase`, if stats are enabled"""
+        if self._stats is None:
+            return function
+        times = self._stats['time']
+
+        def timed(*args):
+            start = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                times[phase] += time.perf_counter() - start
+        return timed
+
+    def _stepCount(self, chunk):
+        """Count the characters of a chunk that will step the rotors"""
+        if self.machineMode == MODE.BYTE:
+            return len(chunk)
+        return len(bytes(chunk).translate(None, _CLASSIC_DELETE))
+
+    def _formattedSize(self, count):
+        """Return the size of `count` classic mode letters once formatted"""
+        if self.formatter:
+            return self.formatter.size(count)
+        return count
+
+    @property
+    def mode(self):
+        """
+        Output mode of classic mode. Changing it swaps the formatter;
+        OUTPUT.CONTINUOUS drops it, and OUTPUT.PENTAGRAPH puts groups of five
+        back in unless a formatter is already set.
+        """
+        return self._mode
+
+    @mode.setter
+    def mode(self, mode):
+        self._mode = mode
+        if mode == OUTPUT.CONTINUOUS:
+            self.formatter = None
+        elif self.formatter is None:
+            self.formatter = formatting.GroupFormatter()
+
+    @property
+    def pentacount(self):
+        """Letters written into the current line of formatted output"""
+        return self.formatter.count if self.formatter else 0
+
+    @pentacount.setter
+    def pentacount(self, count):
+        if self.formatter:
+            self.formatter.count = count
 
     def translateString(self, s, **kwargs):
         """Lazy method to translate a string"""
@@ -270,19 +866,61 @@ class Machine:
 
         return str(self.translateChunk(bytes(s), **kwargs))
 
-    def _readChunks(self, stream, chunkSize):
-        """Yield discrete chunks from a stream."""
+    def _readChunks(self, stream, chunkSize, reuse=False):
+        """
+        Yield discrete chunks from a stream. `chunkSize` may also be a
+        `_ChunkSizer`, which is asked for the size of every read.
+
+        With `reuse`, chunks are memoryviews of a single buffer that the
+        next read overwrites (when the stream supports readinto), so each
+        one has to be used up before asking for the next.
+        """
+        # Pipes hand over whatever has arrived instead of waiting for a whole
+        # chunk, so that the output keeps flowing when the input trickles in
+        pipe = not self._seekable(stream)
+        read = stream.read
+        if pipe and hasattr(stream, 'read1'):
+            read = stream.read1
+        readinto = getattr(stream, 'readinto', None)
+        if pipe and hasattr(stream, 'readinto1'):
+            readinto = stream.readinto1
+
+        if not reuse or readinto is None:
+            read = self._timed(read, 'read')
+            while True:
+                data = read(getattr(chunkSize, 'size', chunkSize))
+                if not data:
+                    break
+                yield data
+            return
+
+        # Read into one buffer, only reallocating it when the size grows
+        readinto = self._timed(readinto, 'read')
+        view = memoryview(bytearray(0))
         while True:
-            data = stream.read(chunkSize)
-            if not data:
+            size = getattr(chunkSize, 'size', chunkSize)
+            if size > len(view):
+                view = memoryview(bytearray(size))
+            count = readinto(view[:size])
+            if not count:
                 break
-            yield data
+            yield view[:count]
+
+    def _seekable(self, stream):
+        """Check if a stream can be sized and rewound"""
+        seekable = getattr(stream, 'seekable', None)
+        return bool(seekable and seekable())
 
     def _streamSize(self, stream):
-        """Return the size of a stream in bytes"""
-        stream.seek(0, 2)
-        size = stream.tell()
-        stream.seek(0)
+        """
+        Return the number of bytes left in a stream, or None if it can't be
+        sized (ex; a pipe).
+        """
+        if not self._seekable(stream):
+            return None
+        position = stream.tell()
+        size = stream.seek(0, 2) - position
+        stream.seek(position)
         return size
 
     def translateStream(
@@ -290,10 +928,24 @@ class Machine:
             stream_in,
             stream_out=None,
             progressCallback=None,
-            chunkSize=128,
+            chunkSize=None,
+            jobs=1,
+            segmentSize=1 << 20,
+            chunkLimit=1 << 20,
             **kwargs
             ):
-        """Translate a stream (file-like object) chunk by chunk."""
+        """
+        Translate a stream (file-like object) chunk by chunk.
+
+        Input is read into a reused buffer, and translated into another
+        reused buffer on its way out. Unless a fixed `chunkSize` is given,
+        the chunk size adapts; it grows for as long as that improves
+        throughput, up to `chunkLimit` bytes.
+
+        With `jobs` greater than one, the stream is instead split into
+        segments of `segmentSize` bytes which are translated in parallel by a
+        pool of worker processes.
+        """
         # Reset the pentagraph counter
         self.pentacount = 0
 
@@ -309,13 +961,275 @@ class Machine:
         if progressCallback:
             progressCallback(stream_out_size, stream_in_size)
 
+        # Hand off to the worker pool if asked to
+        if jobs > 1:
+            self._translateParallel(
+                stream_in,
+                stream_out,
+                stream_in_size,
+                progressCallback,
+                jobs,
+                segmentSize
+            )
+            return stream_out
+
         # Iterate through chunks
-        for chunk_in in self._readChunks(stream_in, chunkSize):
-            chunk_out = self.translateChunk(chunk_in, **kwargs)
-            stream_out.write(chunk_out)
-            stream_out_size += chunkSize
+        streaming = stream_in_size is None
+        write = self._timed(stream_out.write, 'write')
+        sizer = None
+        if chunkSize is None:
+            sizer = _ChunkSizer(limit=chunkLimit)
+            mark = time.perf_counter()
+        view = memoryview(bytearray(0))
+        for chunk_in in self._readChunks(stream_in, sizer or chunkSize, True):
+            size = sizer.size if sizer else chunkSize
+
+            # Formatting grows a chunk by no more than the formatter would
+            # grow a chunk made of nothing but letters
+            needed = self._formattedSize(len(chunk_in))
+            if needed > len(view):
+                view = memoryview(bytearray(needed))
+            write(view[:self.translateInto(chunk_in, view)])
+            stream_out_size += len(chunk_in)
             if progressCallback:
                 progressCallback(stream_out_size, stream_in_size)
 
+            # A short read from a pipe means the source is waiting on more
+            # data, so push out what has been translated so far
+            if streaming and len(chunk_in) < size:
+                if hasattr(stream_out, 'flush'):
+                    stream_out.flush()
+
+            # Feed full chunks' round trips back into the chunk size
+            if sizer and not sizer.settled:
+                now = time.perf_counter()
+                if len(chunk_in) == size:
+                    sizer.record(size, now - mark)
+                mark = now
+
         # Return the outgoing stream (in case one wasn't passed in)
         return stream_out
+
+    async def translateStreamAsync(
+            self,
+            reader,
+            writer=None,
+            progressCallback=None,
+            chunkSize=1 << 16,
+            executor=None
+            ):
+        """
+        Asynchronous counterpart to `translateStream`. Reads chunks from an
+        asyncio.StreamReader (or any async iterator of bytes), translates them
+        in `executor` (the loop's default when None) so the event loop stays
+        responsive, and writes them to an asyncio.StreamWriter, waiting on
+        drain() for backpressure. The next chunk is read while the current
+        one is being translated.
+        """
+        # Reset the pentagraph counter
+        self.pentacount = 0
+
+        loop = asyncio.get_running_loop()
+
+        # If no outgoing stream is specified, make one
+        if writer is None:
+            writer = io.BytesIO()
+        stream_out_size = 0
+
+        # Readers give chunks on request, iterators give whatever they have
+        if hasattr(reader, 'read'):
+            async def chunks():
+                while True:
+                    chunk = await reader.read(chunkSize)
+                    if not chunk:
+                        break
+                    yield chunk
+            chunks = chunks()
+        else:
+            chunks = reader.__aiter__()
+
+        # Make the initial call to the progress function
+        if progressCallback:
+            progressCallback(stream_out_size, None)
+
+        pending = None
+        while True:
+            try:
+                chunk_in = await chunks.__anext__()
+            except StopAsyncIteration:
+                chunk_in = None
+
+            # Finish off the previous chunk while this one was being read
+            if pending:
+                size, future = pending
+                writer.write(await future)
+                if hasattr(writer, 'drain'):
+                    await writer.drain()
+                stream_out_size += size
+                if progressCallback:
+                    progressCallback(stream_out_size, None)
+
+            if chunk_in is None:
+                break
+            pending = (len(chunk_in), loop.run_in_executor(
+                executor,
+                self.translateChunk,
+                chunk_in
+            ))
+
+        return writer
+
+    def translateMapped(
+            self,
+            path_in,
+            path_out,
+            progressCallback=None,
+            chunkSize=1 << 20
+            ):
+        """
+        Translate one file into another through memory maps. The input is
+        mapped read-only, and the output file is sized up front and mapped
+        for writing, so the data never goes through read() or write() calls.
+        In modern and byte mode, where length is preserved, both paths may
+        name the same file to translate it in place.
+        """
+        # Reset the pentagraph counter
+        self.pentacount = 0
+
+        if os.path.exists(path_out) and not os.path.isfile(path_out):
+            raise ValueError(path_out + ' is not a regular file')
+        inPlace = (
+            os.path.exists(path_out) and os.path.samefile(path_in, path_out)
+        )
+        if inPlace and self.machineMode == MODE.CLASSIC:
+            raise ValueError('Classic mode cannot translate a file in place')
+
+        with open(path_in, 'r+b' if inPlace else 'rb') as file_in:
+            size_in = self._streamSize(file_in)
+            if size_in is None:
+                raise ValueError(path_in + ' is not a regular file')
+            if not size_in:
+                open(path_out, 'wb').close()
+                return
+            if progressCallback:
+                progressCallback(0, size_in)
+
+            access = mmap.ACCESS_WRITE if inPlace else mmap.ACCESS_READ
+            with mmap.mmap(file_in.fileno(), 0, access=access) as map_in:
+                if inPlace:
+                    self._translateMaps(
+                        map_in, map_in, size_in, progressCallback, chunkSize
+                    )
+                    return
+
+                # In classic mode only letters make it through, plus whatever
+                # the formatter puts between groups
+                size_out = size_in
+                if self.machineMode == MODE.CLASSIC:
+                    size_out = 0
+                    for offset in range(0, size_in, chunkSize):
+                        size_out += self._stepCount(
+                            map_in[offset:offset + chunkSize]
+                        )
+                    size_out = self._formattedSize(size_out)
+
+                # Size the output file and translate straight into its map
+                with open(path_out, 'w+b') as file_out:
+                    if not size_out:
+                        return
+                    file_out.truncate(size_out)
+                    with mmap.mmap(file_out.fileno(), size_out) as map_out:
+                        self._translateMaps(
+                            map_in,
+                            map_out,
+                            size_in,
+                            progressCallback,
+                            chunkSize
+                        )
+
+    def _translateMaps(
+            self,
+            map_in,
+            map_out,
+            size_in,
+            progressCallback,
+            chunkSize
+            ):
+        """Translate one memory map into another (or the same) map"""
+        position = 0
+        with memoryview(map_in) as view_in, memoryview(map_out) as view_out:
+            for offset in range(0, size_in, chunkSize):
+                position += self.translateInto(
+                    view_in[offset:offset + chunkSize],
+                    view_out[position:]
+                )
+                if progressCallback:
+                    progressCallback(min(offset + chunkSize, size_in), size_in)
+
+    def _translateParallel(
+            self,
+            stream_in,
+            stream_out,
+            stream_in_size,
+            progressCallback,
+            jobs,
+            segmentSize
+            ):
+        """
+        Translate a stream by segments across a pool of worker processes.
+
+        Only letters step the rotors, so the starting position of each segment
+        is found by counting the letters in the segments before it and
+        advancing the rotors arithmetically. The formatter's place carries over
+        from segment to segment the same way. Output is written in order.
+        """
+        compiled = self._compile()
+        compiled.load(self.rotors)
+        state = self.stateGet()
+        options = {
+            'outputMode': self.mode,
+            'formatter': self.formatter,
+            'cycle': self._cycle,
+            'backend': self.backend,
+            'machineMode': self.machineMode
+        }
+        stream_out_size = 0
+
+        with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+            pending = collections.deque()
+            for segment in self._readChunks(stream_in, segmentSize):
+                pending.append((len(segment), executor.submit(
+                    _translateSegment,
+                    state,
+                    options,
+                    tuple(compiled.settings),
+                    self.pentacount,
+                    segment
+                )))
+
+                # Work out where the next segment starts
+                count = self._stepCount(segment)
+                if self._stats is not None:
+                    self._statsCount(len(segment), count, compiled.settings)
+                compiled.advance(count)
+                if self.formatter:
+                    self.formatter.skip(count)
+
+                # Keep a bounded number of segments in flight
+                while len(pending) > 2 * jobs or (
+                        pending and pending[0][1].done()):
+                    size, future = pending.popleft()
+                    stream_out.write(future.result())
+                    stream_out_size += size
+                    if progressCallback:
+                        progressCallback(stream_out_size, stream_in_size)
+
+            # Collect the stragglers
+            while pending:
+                size, future = pending.popleft()
+                stream_out.write(future.result())
+                stream_out_size += size
+                if progressCallback:
+                    progressCallback(stream_out_size, stream_in_size)
+
+        compiled.store(self.rotors)
@@ -0,0 +1,87 @@
+# stdlib imports
+import datetime
+import sys
+import time
+
+# third party imports
+
+# local module imports
+
+
+class Progress:
+    """
+    Rate-limited progress meter, used as the `progressCallback` of any of the
+    machine's translate methods. It can be called after every chunk, but only
+    redraws once every `interval` seconds, so a fast run isn't slowed down by
+    formatting and writing to the terminal.
+
+    Shows how much has been consumed (as a percentage when the total is
+    known), the average throughput, and the estimated time left. `describe`
+    can return some extra text to lead the line with; it's only called when
+    the line is actually drawn. Progress is counted in bytes, unless some
+    other `unit` is given.
+    """
+
+    def __init__(self, stream=None, interval=0.5, describe=None, unit=None):
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.describe = describe
+        self.unit = unit
+        self.start = time.monotonic()
+        self.current = 0
+        self.total = None
+        self._next = self.start
+        self._width = 0
+
+    def __call__(self, current, total):
+        self.current = current
+        self.total = total
+        now = time.monotonic()
+        if now >= self._next:
+            self._next = now + self.interval
+            self.draw(now)
+
+    def rate(self, now=None):
+        """Average bytes (or units) per second since the meter was started"""
+        elapsed = (now or time.monotonic()) - self.start
+        return self.current / elapsed if elapsed > 0 else 0.0
+
+    def eta(self, now=None):
+        """Estimated seconds left, or None if it can't be worked out"""
+        rate = self.rate(now)
+        if not self.total or not rate:
+            return None
+        return max(0.0, (self.total - self.current) / rate)
+
+    def draw(self, now=None):
+        """Draw the progress line, over top of the last one"""
+        now = now or time.monotonic()
+        unit = self.unit or 'BYTES'
+        if self.total:
+            progress = '{0}%'.format(int(self.current / self.total * 100.0))
+        else:
+            progress = '{0} {1}'.format(self.current, unit)
+        if self.unit:
+            rate = '{0:,.0f} {1}/s'.format(self.rate(now), unit)
+        else:
+            rate = '{0:.2f} MEGABYTES/s'.format(
+                self.rate(now) / 1024.0 / 1024.0
+            )
+        line = 'PROGRESS: {0} ({1})'.format(progress, rate)
+
+        eta = self.eta(now)
+        if eta is not None:
+            line += '  ETA: {0}'.format(datetime.timedelta(seconds=int(eta)))
+        if self.describe:
+            line = self.describe() + '    ' + line
+
+        # Pad out whatever is left of a longer previous line
+        self.stream.write('\r' + line.ljust(self._width))
+        self.stream.flush()
+        self._width = len(line)
+
+    def finish(self):
+        """Draw the final state of the meter and move off of its line"""
+        self.draw()
+        self.stream.write('\n')
+        self.stream.flush()
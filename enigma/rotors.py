@@ -1,32 +1,111 @@
 # stdlib module imports
 import array
+import functools
 import sys
 
 # third-party module imports
 import colorama
 
-
-def stringToRotor(s):
-    '''Turn a string into an instantiated rotor'''
-    # Get all immediate subclasses of the rotor base class
-    classes = _RotorBase.__subclasses__()
-
+# Alphabet of byte-compatible rotors and reflectors (every 8-bit value)
+_BYTES = bytes(range(256))
+
+# Registered rotor and reflector classes, keyed by short-name. Every subclass
+# of the base classes lands here when it is defined, unless its class name
+# starts with an underscore.
+ROTORS = {}
+REFLECTORS = {}
+
+# Sorted short-names per (registry, alphabet size), rebuilt on registration
+_names = {}
+
+
+def register(cls, replace=False):
+    '''
+    Register a rotor or reflector class under its short-name. External
+    catalogs only need to subclass `_RotorBase` or `_ReflectorBase` and be
+    imported, but can call this directly to register an underscored class, or
+    to knowingly `replace` an existing short-name.
+    '''
+    registry = REFLECTORS if issubclass(cls, _ReflectorBase) else ROTORS
+    existing = registry.get(cls._short)
+    if existing is not None and existing is not cls and not replace:
+        raise ValueError(
+            'Short-name ' + cls._short + ' of ' + cls._name +
+            ' is already used by ' + existing._name
+        )
+    registry[cls._short] = cls
+    _names.clear()
+    parseRotor.cache_clear()
+    return cls
+
+
+def rotorNames(size=26):
+    '''Sorted short-names of the rotors with a `size`-symbol alphabet'''
+    return _sortedNames(ROTORS, size)
+
+
+def reflectorNames(size=26):
+    '''Sorted short-names of the reflectors with a `size`-symbol alphabet'''
+    return _sortedNames(REFLECTORS, size)
+
+
+def families():
+    '''
+    Group the sorted short-names of the registered rotors and reflectors by
+    machine family (the part of their names before " - "), returning a
+    dictionary of family name to (rotor names, reflector names).
+    '''
+    grouped = {}
+    for index, registry in enumerate((ROTORS, REFLECTORS)):
+        for short, cls in sorted(registry.items()):
+            family = cls._name.split(' - ')[0]
+            grouped.setdefault(family, ([], []))[index].append(short)
+    return grouped
+
+
+def _sortedNames(registry, size):
+    key = (registry is REFLECTORS, size)
+    if key not in _names:
+        _names[key] = tuple(sorted(
+            short for short, cls in registry.items() if len(cls._abet) == size
+        ))
+    return _names[key]
+
+
+@functools.lru_cache(maxsize=4096)
+def parseRotor(s):
+    '''
+    Parse a rotor spec string (SHORTNAME[:SETTING[:NOTCHES]], ex; com1:C:QV)
+    into its class, setting, and notches. Results are cached, since key sheets
+    tend to repeat the same few specs over and over.
+    '''
     # split the argument into name and settings
     split = s.split(':')
 
     # lookup the rotor
     name = split[0]
-    rotor = None
-    for c in classes:
-        if name == c._short:
-            rotor = c
-            break
+    rotor = ROTORS.get(name)
     if not rotor:
         raise ValueError(name + ' is not a valid rotor short-name')
 
-    # extract the other settings
-    setting = split[1].upper() if len(split) > 1 else None
-    notches = split[2].upper() if len(split) > 2 else None
+    # extract the other settings. Byte rotors take numbers, since most of
+    # their alphabet can't be typed (ex; byte1:0x41:16,200)
+    setting = split[1] if len(split) > 1 else None
+    notches = split[2] if len(split) > 2 else None
+    if isinstance(rotor._abet, bytes):
+        setting = int(setting, 0) if setting else None
+        notches = tuple(int(n, 0) for n in notches.split(',')) if notches \
+            else None
+    else:
+        setting = setting.upper() if setting else None
+        notches = notches.upper() if notches else None
+
+    return rotor, setting, notches
+
+
+def stringToRotor(s):
+    '''Turn a string into an instantiated rotor'''
+    rotor, setting, notches = parseRotor(s)
 
     # Instantiate the rotor
     return rotor(setting=setting, notches=notches)
@@ -34,13 +113,7 @@ def stringToRotor(s):
 
 def stringToReflector(s):
     '''Turn a string into an instantiated reflector'''
-    # Get all immediate subclasses of the reflector base class
-    classes = _ReflectorBase.__subclasses__()
-    reflector = None
-    for c in classes:
-        if s == c._short:
-            reflector = c
-            break
+    reflector = REFLECTORS.get(s)
     if not reflector:
         raise ValueError(s + ' is not a valid reflector short-name')
 
@@ -48,15 +121,37 @@ def stringToReflector(s):
     return reflector()
 
 
-class _RotorBase:
+class _RotorMeta(type):
+    '''Give every rotor class empty `__slots__`, unless it declares its own'''
+
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        namespace.setdefault('__slots__', ())
+        return super().__new__(mcs, name, bases, namespace, **kwargs)
+
+
+class _RotorBase(metaclass=_RotorMeta):
     '''Base rotor class. Inherited by all proper rotors. NOT FOR CRYPTO USE!'''
 
+    # Instances only carry what changes; wiring is shared by the whole class
+    __slots__ = ('setting', 'next', 'previous', 'notches')
+
     # class variables
     _name = 'BASE ROTOR'
     _short = 'base'
     _abet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
     _wiring = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
     _notches = 'A'
+    _stepping = True
+
+    def __init_subclass__(cls, **kwargs):
+        '''
+        Add every public rotor and reflector class that names its own
+        short-name to the registry. Subclasses that only inherit one (ex;
+        a built-in rotor with custom notches) are left out.
+        '''
+        super().__init_subclass__(**kwargs)
+        if not cls.__name__.startswith('_') and '_short' in cls.__dict__:
+            register(cls)
 
     def __init__(self, setting=None, notches=None):
         '''Instantiate a new Rotor with custom or default settings'''
@@ -66,34 +161,57 @@ class _RotorBase:
 
         # Initial rotor setting. 0 if not defined.
         if setting:
-            self.setting = self._abet.index(setting)
+            self.setting = self._pin(setting)
         else:
             self.setting = 0  # A
 
-        # Initialize and program wiring matrices
-        self.wiring_forward = array.array('b', [0 for i in range(26)])
-        self.wiring_reverse = array.array('b', [0 for i in range(26)])
+        # Wiring and default notch tables are built once per class
+        cls = type(self)
+        if '_defaultNotches' not in cls.__dict__:
+            cls._compile()
 
-        for i in range(26):
-            x = i
-            y = self._wiring[i]
-            y = self._abet.index(y)
-            self.wiring_forward[x] = y - x
-            self.wiring_reverse[y] = x - y
+        # Only custom notches need a table of their own
+        if notches:
+            self.notches = cls._notchTable(notches)
+        else:
+            self.notches = cls._defaultNotches
+
+    @classmethod
+    def _compile(cls):
+        '''Program the wiring matrices shared by every instance of the class'''
+        size = len(cls._abet)
+        forward = array.array('h', [0 for i in range(size)])
+        reverse = array.array('h', [0 for i in range(size)])
 
-        # Initialize the notch matrix
-        self.notches = array.array('b', [0 for i in range(26)])
-        for notch in notches or self._notches:
-            self.notches[self._abet.index(notch)] = 1
+        for i in range(size):
+            x = i
+            y = cls._pin(cls._wiring[i])
+            forward[x] = y - x
+            reverse[y] = x - y
+
+        cls.wiring_forward = forward
+        cls.wiring_reverse = reverse
+        cls._defaultNotches = cls._notchTable(cls._notches)
+
+    @classmethod
+    def _notchTable(cls, notches):
+        '''Build an (immutable) notch matrix from a sequence of symbols'''
+        table = bytearray(len(cls._abet))
+        for notch in notches:
+            table[cls._pin(notch)] = 1
+        return bytes(table)
+
+    @classmethod
+    def _pin(cls, symbol):
+        '''Convert a symbol of the rotor's alphabet into a pin'''
+        # Byte alphabets accept raw numbers, or characters by their ordinal
+        if isinstance(cls._abet, bytes) and isinstance(symbol, str):
+            symbol = ord(symbol)
+        return cls._abet.index(symbol)
 
     def _loop(self, n):
         '''Constrain a number N such that 0 <= i <= N in a circular fashion'''
-        while n < 0 or n > 25:
-            if n > 25:
-                n -= 26
-            if n < 0:
-                n += 26
-        return n
+        return n % len(self._abet)
 
     def step(self):
         '''
@@ -102,7 +220,8 @@ class _RotorBase:
         next rotor in the series should be advanced by one letter as well
         '''
         # increment rotor index, checking for loop condition
-        self.setting = 0 if self.setting == 25 else self.setting + 1
+        last = len(self._abet) - 1
+        self.setting = 0 if self.setting == last else self.setting + 1
 
         # If a notch is hit, increment the next in the series
         if self.notches[self.setting] and self.next:
@@ -378,6 +497,7 @@ class M4_Beta(_RotorBase):
     _short = 'm4beta'
     _wiring = 'LEYJVCNIXWPBQMDRTAKZGFUHOS'
     _notches = ''
+    _stepping = False
 
     def step(self):
         """This rotor does not step."""
@@ -389,6 +509,7 @@ class M4_Gamma(_RotorBase):
     _short = 'm4gamma'
     _wiring = 'FSOKANUERHMBTIYCWLQPZXVGJD'
     _notches = ''
+    _stepping = False
 
     def step(self):
         """This rotor does not step."""
@@ -733,17 +854,194 @@ class T_UKW(_ReflectorBase):
     _wiring = 'GEKPBTAUMOCNILJDXZYFHWVQSR'
 
 
+# # # Byte # # #
+# Full 8-bit alphabet, for byte mode. Wirings from `generate.py`
+class Byte_I(_RotorBase):
+    _name = 'Byte - Rotor I'
+    _short = 'byte1'
+    _abet = _BYTES
+    _wiring = (
+        b'\x1f\x5f\x12\xc5\xe8\xe3\xf3\xcc\x6e\x87\xad\x8e\x68\xca\x31\x95'
+        b'\x1e\x5b\xbc\xc8\x58\x56\x26\xee\xfe\xf0\x48\xc4\x83\x4b\xec\x63'
+        b'\xc9\x70\xa4\x0c\x36\xd1\xd5\xb5\x6d\x43\xae\xd4\x29\x8f\xd7\x7b'
+        b'\x9e\x82\xe2\x03\x7a\x7d\x2a\xd9\x94\x96\x24\x7f\x33\x9d\xcf\x65'
+        b'\xd3\x59\x25\xac\x5d\x42\xb7\xb2\xbb\x3f\xde\xaf\x98\x51\x2e\xbd'
+        b'\x02\x4d\x0f\x2b\x27\x09\xb6\x0d\x35\x11\x52\x49\xfb\xea\x89\x9f'
+        b'\xfc\x22\xe9\x71\xb4\x8a\x75\x4e\xd6\xe0\xc6\xf1\x18\xc0\x05\x8d'
+        b'\x69\x78\x7c\x41\xe6\xd0\xdb\x4a\x92\x16\x0b\x64\x2d\x00\x80\x23'
+        b'\xed\x5c\x0e\xcb\xa8\x9a\xb3\x14\x39\xaa\xc7\xef\xe7\x91\xce\x5a'
+        b'\x1d\x72\xf7\xbf\x10\x17\x1b\x01\x3b\x76\xdd\x66\xab\xdf\x32\x40'
+        b'\x85\xf8\x57\xa0\x44\xd8\x47\x28\xba\x08\x79\x50\xcd\x61\x90\xf4'
+        b'\x04\x81\xa7\xfd\x99\xa9\x21\x0a\xff\x15\x06\x7e\x07\xf6\xa5\x67'
+        b'\xa3\x2c\x45\x60\x2f\x34\xe5\x3a\x38\x6b\xf9\x9c\x46\xfa\xb1\x73'
+        b'\xe4\xbe\xc2\x86\x4c\xa1\xc1\xa6\x37\x93\x4f\x3d\xdc\x8c\x20\xc3'
+        b'\x74\xa2\x6a\x55\xf5\xb0\xf2\xda\xeb\x1a\x77\x9b\x1c\x13\xd2\xe1'
+        b'\x6f\x54\x6c\x62\xb9\x3c\x19\x88\x84\xb8\x53\x5e\x8b\x97\x30\x3e'
+    )
+    _notches = b'\xa3'
+
+
+class Byte_II(_RotorBase):
+    _name = 'Byte - Rotor II'
+    _short = 'byte2'
+    _abet = _BYTES
+    _wiring = (
+        b'\x86\x95\x57\x36\x51\x2f\x5f\xb7\xae\xf8\x53\x13\x72\x98\xf6\x5c'
+        b'\x85\x09\x0d\x07\x29\x7c\xfc\xec\x8e\xff\x97\x3d\x60\x19\x79\x3b'
+        b'\x00\x90\xee\xc8\x9f\x7d\xb1\x02\xf4\xa7\xed\x2d\x20\xa8\xa3\xf7'
+        b'\x10\x58\x47\xdd\xa5\x4b\xbb\x1e\x33\x93\xf2\x96\xfd\x6d\xbf\x16'
+        b'\x94\xe7\x28\x15\x05\x73\xc2\x0f\x27\x40\x3f\x14\x64\x1f\xc9\x99'
+        b'\x8f\xdc\x31\xea\xd4\x7a\xb0\x08\x63\x03\xe6\xc5\xa6\x69\xdf\x6c'
+        b'\x44\x42\xda\xcf\xc7\x9c\x6e\x11\x6b\x52\x81\x25\xbe\x34\xb3\x24'
+        b'\xa2\x80\x5e\xe5\x84\x50\x83\x55\x74\x66\xfa\xe4\x92\x4f\x01\x12'
+        b'\x75\xa0\xde\xf0\xc6\x8a\x61\x7e\x7f\xb8\x9b\x78\xfe\xaf\x56\x70'
+        b'\x71\xe3\xe9\xd0\x37\x1b\x48\xbd\xc4\xef\xbc\xc3\x8b\xba\xe1\xb9'
+        b'\x91\xad\xeb\x67\x2b\x88\x87\x23\xb5\xb2\x89\x9e\xf5\x1d\xa1\x3c'
+        b'\x06\x38\xce\x8d\xe0\x17\x39\x4c\x46\x82\x2c\xd5\xf3\xb4\x30\xd6'
+        b'\x76\x3e\xcb\x5d\xd1\x6f\xd7\x65\x59\x49\x0c\xd3\x5a\x9d\x5b\x21'
+        b'\x4e\xac\x68\xc0\xe2\x32\x8c\x7b\x22\x45\xc1\x0b\x0a\x54\xab\x43'
+        b'\x41\x0e\xcc\x18\x2a\xaa\x3a\xf9\xdb\x9a\x4a\xb6\x26\xfb\x04\x2e'
+        b'\xa4\x77\xca\xd2\x62\xa9\xe8\xf1\x6a\x1a\xd9\x1c\xd8\x35\xcd\x4d'
+    )
+    _notches = b'\xb4'
+
+
+class Byte_III(_RotorBase):
+    _name = 'Byte - Rotor III'
+    _short = 'byte3'
+    _abet = _BYTES
+    _wiring = (
+        b'\x12\x2c\x55\x10\xec\x28\x83\xe8\x2e\x45\x4a\xa9\xe1\xb3\x4f\x59'
+        b'\x7f\x06\x3f\x61\x04\xc3\xfc\xf7\xa2\xe9\xd4\x4d\x97\x7b\xbc\xb7'
+        b'\x49\x6a\x3c\x72\x51\xeb\xed\x5c\x63\xae\x87\x9d\x74\x66\x36\x32'
+        b'\xa0\x2f\xee\x05\xf5\xb0\x14\x6b\xc2\x67\x0a\xd2\xd6\x08\x11\x2a'
+        b'\xd0\x6d\x31\xac\xcf\xfb\x69\x3b\x65\x68\x94\xdb\xff\xe2\x5d\xf9'
+        b'\x5e\x76\x78\x40\x07\x1b\x7e\x02\xbf\x9f\x81\xd9\x29\x7d\x7a\x18'
+        b'\xc0\x23\xa7\x30\x58\x53\x8b\xca\x52\x24\x8e\x57\x26\xe0\x98\x8f'
+        b'\x09\xd1\xd8\x48\x01\x33\xc8\xb4\x6f\xa8\x77\x9e\x1d\x15\x86\xe5'
+        b'\x84\xaa\xa5\x3d\x92\x5a\x85\x21\x80\x56\xdd\x6c\x50\xe7\xfa\x1a'
+        b'\x17\xc7\xea\x00\x79\xa3\xd5\x1e\x70\xc6\xc1\x96\xd7\x39\x1c\xe6'
+        b'\xf0\xf6\x20\x60\x54\x0e\x1f\xc5\x0f\x62\xcb\xcd\xce\xb8\x8a\xc4'
+        b'\xf2\x35\x5f\x37\x71\x4b\x90\x9c\xba\xa1\x99\xbb\xde\xa4\xfd\x13'
+        b'\xef\x38\xab\xb9\x89\x7c\x2b\x27\xf4\xb2\x03\x0b\x73\x2d\xad\xdf'
+        b'\xb1\x8d\xb5\x41\x0c\x64\x91\xb6\x88\xbd\x9a\xf8\x46\x0d\x22\x8c'
+        b'\x95\xe3\x82\x3a\x4e\xfe\xf3\x43\xcc\x9b\xda\xa6\x25\xaf\x47\x19'
+        b'\x93\xbe\x16\xdc\x6e\xf1\x3e\x42\xe4\x4c\x34\x75\xd3\x44\xc9\x5b'
+    )
+    _notches = b'\xb7'
+
+
+class Byte_IV(_RotorBase):
+    _name = 'Byte - Rotor IV'
+    _short = 'byte4'
+    _abet = _BYTES
+    _wiring = (
+        b'\xc9\x83\xd3\xd1\xd4\x12\x5e\x7f\x3f\x6a\x93\xbc\xe0\x74\xba\x34'
+        b'\x77\x53\xb1\x5f\x14\xf5\x88\xa7\x8f\xbd\xe1\x60\xc7\x33\x73\x87'
+        b'\x99\x16\xf4\x7d\x19\x47\x4b\x90\xa5\x9a\x9f\xfe\xb8\x95\x82\xcf'
+        b'\xf8\x6d\xb7\xd6\x9e\x7a\x80\xa0\x5a\x79\x66\x22\x59\xff\xe2\x10'
+        b'\x44\xed\xa1\x67\xb5\xf6\x0b\x86\xfa\xa4\xc6\x76\x1a\x72\x65\x40'
+        b'\x48\xc1\xf1\xa2\x98\x55\xf0\x81\x30\x3a\x13\x5b\xf9\xdc\x3c\x43'
+        b'\xe4\xab\xcb\xf2\x49\xbb\xa6\x8e\x1f\x05\x11\x89\xad\x0a\x06\x1c'
+        b'\x1e\x41\x04\xc2\xd2\x7c\xe9\x42\x4f\xdf\xc8\xce\xda\x50\xb9\xb3'
+        b'\x58\xee\xfd\x00\xa9\x5d\x01\x96\xdb\x54\x6f\x4d\xdd\x3d\x45\x26'
+        b'\x3e\x15\x3b\xea\x03\xbf\x24\xeb\x71\x56\xb4\xa3\xac\xc5\x36\x4c'
+        b'\x9c\x68\x2a\x21\x7b\xa8\xd8\x8b\xaf\xd0\x9b\x75\x8d\x4a\x28\x29'
+        b'\xb0\x57\x2f\x46\x61\xef\xc0\x07\xbe\xc4\x4e\xd7\x92\x0d\x27\x6b'
+        b'\x37\xb6\x18\xfb\xde\x2e\x8a\x2d\x0e\x7e\x08\xae\x85\x52\x31\x20'
+        b'\x8c\x63\x94\x39\xe6\xe5\x17\x5c\xd5\x64\xaa\xe8\xc3\x0f\xca\x1d'
+        b'\x38\x97\xcd\xd9\x6c\x84\x69\xf3\x78\xfc\x23\x2b\x1b\xb2\xe7\xe3'
+        b'\x02\x9d\x62\x0c\x6e\x70\xcc\x09\x35\xec\x2c\x51\x25\xf7\x32\x91'
+    )
+    _notches = b'\xcc'
+
+
+class Byte_V(_RotorBase):
+    _name = 'Byte - Rotor V'
+    _short = 'byte5'
+    _abet = _BYTES
+    _wiring = (
+        b'\xb2\xb0\x87\x04\x80\x06\xe7\x7b\x72\xc1\xf4\x7d\xde\x43\x15\x61'
+        b'\x31\x47\x39\xe0\x51\x94\x65\x71\xea\x05\xe1\x25\x60\xbc\x85\x1d'
+        b'\xfd\x2a\xb1\xf7\x84\x19\x08\x8d\xf9\x2e\xa8\xd1\xa2\xdc\x3b\x5d'
+        b'\x76\x8a\x90\xbb\xce\xc3\x10\x32\xe8\xbe\x89\x79\x3c\xef\xa7\xff'
+        b'\x00\x33\x67\xb5\xdd\xa6\xfb\xf3\x9a\x1e\xb4\x93\xcf\x40\x6a\xc0'
+        b'\xb8\xcd\x02\xc7\x13\x1f\x83\x35\x8c\x68\x45\x50\xeb\x22\x0b\x5f'
+        b'\x24\x30\x1a\x5b\x0e\x69\x1b\x1c\x5e\x14\x55\xb9\xaa\xe9\x54\x52'
+        b'\x4c\x5c\x82\x12\xd2\x4a\x8b\x78\x07\x16\x99\xa0\x63\x4e\xee\x2d'
+        b'\x44\xf0\x29\xfa\xa9\xd5\x17\xd7\xb3\xdf\xa4\x20\xbf\x3e\xba\xf8'
+        b'\x46\xd4\x62\x7c\x4f\xfe\x66\x57\x9e\x96\x9d\x3a\x6f\xad\x36\xed'
+        b'\x11\x03\xe2\xb7\x27\x2f\xbd\x6c\x81\x28\x8e\x6d\xf5\xfc\xe3\xd8'
+        b'\x73\x21\x7e\xaf\xca\x7f\x0c\xec\x7a\x9c\x48\xdb\x18\x2c\xd0\x09'
+        b'\x9f\x56\x86\xb6\xc9\x3d\x92\x97\xc6\xc4\x4d\x26\x5a\xd6\x91\xab'
+        b'\x6e\xf1\x23\x2b\xa5\x01\x0d\x9b\xcc\x0a\x59\xac\x77\xd3\x88\x4b'
+        b'\x3f\x74\x58\x41\x98\x0f\xa1\x53\xe4\xf2\x37\xc5\x6b\x95\xda\xcb'
+        b'\x38\xe5\x64\xd9\x8f\x42\x34\xc8\x75\xa3\x49\xae\xe6\xc2\x70\xf6'
+    )
+    _notches = b'\xe6'
+
+
+class Byte_UKW_A(_ReflectorBase):
+    _name = 'Byte - Reflector A'
+    _short = 'bytea'
+    _abet = _BYTES
+    _wiring = (
+        b'\x49\xfb\xab\x85\xdb\xac\x36\x89\x3e\x11\x4f\x55\x66\x5e\x7e\x93'
+        b'\x48\x09\xf3\x62\x6d\xbb\x35\x31\x9a\x2a\x79\x65\xc1\xe8\x2c\x86'
+        b'\xe1\x42\xbe\x4c\x98\xec\xa8\xd5\x9e\xb5\x19\x94\x1e\x5a\xe4\xd9'
+        b'\xd7\x17\x7a\xb9\x95\x16\x06\xd4\xf6\x73\x8f\xfe\xc7\x5d\x08\x6c'
+        b'\xb3\xff\x21\x88\x54\xb6\x80\x58\x10\x00\x82\xad\x23\xb0\xc3\x0a'
+        b'\xaf\x9c\x68\xf0\x44\x0b\x9b\xbf\x47\x83\x2d\x97\xc4\x3d\x0d\x7f'
+        b'\x77\xf7\x13\xd1\x8a\x1b\x0c\xd8\x52\xe6\xbd\xa4\x3f\x14\xea\x9f'
+        b'\x91\xc0\xe5\x39\xe9\xf5\xf8\x60\xe3\x1a\x32\x8e\xd6\xc9\x0e\x5f'
+        b'\x46\xfa\x4a\x59\xce\x03\x1f\xa3\x43\x07\x64\xef\xd3\xbc\x7b\x3a'
+        b'\xba\x70\xcf\x0f\x2b\x34\xb2\x5b\x24\xcb\x18\x56\x51\xb7\x28\x6f'
+        b'\xe2\xb4\xd2\x87\x6b\xf1\xeb\xb8\x26\xde\xca\x02\x05\x4b\xc6\x50'
+        b'\x4d\xc8\x96\x40\xa1\x29\x45\x9d\xa7\x33\x90\x15\x8d\x6a\x22\x57'
+        b'\x71\x1c\xe7\x4e\x5c\xdd\xae\x3c\xb1\x7d\xaa\x99\xfc\xed\x84\x92'
+        b'\xdc\x63\xa2\x8c\x37\x27\x7c\x30\x67\x2f\xee\x04\xd0\xc5\xa9\xfd'
+        b'\xf9\x20\xa0\x78\x2e\x72\x69\xc2\x1d\x74\x6e\xa6\x25\xcd\xda\x8b'
+        b'\x53\xa5\xf4\x12\xf2\x75\x38\x61\x76\xe0\x81\x01\xcc\xdf\x3b\x41'
+    )
+
+
+class Byte_UKW_B(_ReflectorBase):
+    _name = 'Byte - Reflector B'
+    _short = 'byteb'
+    _abet = _BYTES
+    _wiring = (
+        b'\x74\x24\x7b\x6c\x1a\x8c\xda\x1b\x91\xe9\xbb\x2d\xb5\x9f\x4e\x88'
+        b'\xd9\x87\xc6\x73\xef\xed\x70\x58\xca\x52\x04\x07\x3e\x3a\x27\x89'
+        b'\x5d\xde\x79\xf4\x01\xc7\xf9\x1e\xe1\xa1\xfe\x33\x66\x0b\x31\x3f'
+        b'\xe3\x2e\x8b\x2b\xbd\x72\x53\xf0\x98\x57\x1d\xc1\xb4\x83\x1c\x2f'
+        b'\xf3\xdf\xa8\xee\xaf\xe2\x9d\x86\x4c\xb6\xa9\xfa\x48\xbe\x0e\x6b'
+        b'\xb8\xf5\x19\x36\xd4\x7f\xab\x39\x17\xfb\x62\x90\xff\x20\x6f\x85'
+        b'\xb2\xcb\x5a\x7e\x67\xc0\x2c\x64\xb1\xa3\xa7\x4f\x03\xd5\x8a\x5e'
+        b'\x16\x75\x35\x13\x00\x71\xae\x8d\xa4\x22\x94\x02\xce\xb3\x63\x55'
+        b'\xc5\xcf\xa6\x3d\x95\x5f\x47\x11\x0f\x1f\x6e\x32\x05\x77\xd6\xc3'
+        b'\x5b\x08\xc8\xc4\x7a\x84\xf1\xe7\x38\xdb\xd0\x9e\xe6\x46\x9b\x0d'
+        b'\xe0\x29\xf7\x69\x78\xdd\x82\x6a\x42\x4a\xe4\x56\xd8\xfd\x76\x44'
+        b'\xcd\x68\x60\x7d\x3c\x0c\x49\xec\x50\xe8\xd3\x0a\xbf\x34\x4d\xbc'
+        b'\x65\x3b\xd7\x8f\x93\x80\x12\x25\x92\xdc\x18\x61\xfc\xb0\x7c\x81'
+        b'\x9a\xf2\xf8\xba\x54\x6d\x8e\xc2\xac\x10\x06\x99\xc9\xa5\x21\x41'
+        b'\xa0\x28\x45\x30\xaa\xea\x9c\x97\xb9\x09\xe5\xf6\xb7\x15\x43\x14'
+        b'\x37\x96\xd1\x40\x23\x51\xeb\xa2\xd2\x26\x4b\x59\xcc\xad\x2a\x5c'
+    )
+
+
 def main():
     import json
 
     # output a list of rotors and reflectors
     print('ROTORS')
     print(json.dumps(
-        [[r._name, r._short] for r in sorted(_RotorBase.__subclasses__(), key=lambda x: x._name)]
+        [[r._name, r._short]
+         for r in sorted(ROTORS.values(), key=lambda x: x._name)]
     ))
     print('REFLECTORS')
     print(json.dumps(
-        [[r._name, r._short] for r in sorted(_ReflectorBase.__subclasses__(), key=lambda x: x._name)]
+        [[r._name, r._short]
+         for r in sorted(REFLECTORS.values(), key=lambda x: x._name)]
     ))
 
 
@@ -0,0 +1,335 @@
+# stdlib imports
+import asyncio
+import json
+import socket
+
+# third party imports
+
+# local module imports
+import enigma.machine as emachine
+
+
+def _split(address):
+    """Split a `unix:PATH` or `tcp:HOST:PORT` address into its parts"""
+    kind, _, where = address.partition(':')
+    if kind == 'unix':
+        return kind, where
+    if kind == 'tcp':
+        host, _, port = where.rpartition(':')
+        return kind, (host, int(port))
+    raise ValueError(address + ' is not a valid unix: or tcp: address')
+
+
+class Server:
+    """
+    Long-running translation daemon. Named machine sessions stay resident
+    between requests, so their rotors progress continuously from one request
+    to the next, and clients can pipeline any number of requests over one
+    connection.
+
+    Every request is a line of JSON with an `op`, followed by `size` bytes of
+    raw payload. Every response is a line of JSON with `ok` set, followed by
+    `size` bytes of raw payload. Supported ops are;
+
+    - open: create (or replace) a session from `rotors`, `reflector`,
+      `plugboard`, `seed`, or a `state` file path, plus optional `mode`
+      (classic/modern/byte) and `output` (pentagraph/continuous). With
+      `update`, the state file is written back when the session is closed
+      or the server stops.
+    - translate: translate the payload through a session.
+    - settings: list a session's rotor settings.
+    - close: drop a session.
+    - list: list the open sessions.
+
+    Translate requests that queue up behind each other for the same session
+    are handled as one batch, in a single trip to the executor.
+    """
+
+    def __init__(self, batchSize=64):
+        self.batchSize = batchSize
+        self.sessions = {}
+        self._locks = {}
+        self._paths = {}
+
+    async def start(self, address):
+        """Start listening on `address` and return the asyncio server"""
+        kind, where = _split(address)
+        if kind == 'unix':
+            return await asyncio.start_unix_server(self._connection, where)
+        return await asyncio.start_server(self._connection, *where)
+
+    async def serve(self, address):
+        """Serve on `address` until cancelled, then save any state files"""
+        server = await self.start(address)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for name in list(self._paths):
+                self._save(name)
+
+    def _save(self, name):
+        """Write a session's state back to the file it was loaded from"""
+        path = self._paths.get(name)
+        if path:
+            with open(path, 'wb') as file:
+                file.write(self.sessions[name].stateGet())
+
+    async def _connection(self, reader, writer):
+        """Read requests off a connection and queue them up in order"""
+        queue = asyncio.Queue()
+        responder = asyncio.ensure_future(self._respond(queue, writer))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line.decode())
+                    if not isinstance(request, dict):
+                        raise ValueError('Requests must be JSON objects')
+                    size = request.get('size', 0)
+                    if type(size) is not int or size < 0:
+                        raise ValueError('Invalid payload size ' + repr(size))
+                    payload = await reader.readexactly(size)
+                except (ValueError, asyncio.IncompleteReadError) as error:
+                    await queue.put(
+                        ({'op': 'error', 'error': str(error)}, b'')
+                    )
+                    break
+                await queue.put((request, payload))
+            await queue.put(None)
+            await responder
+        except asyncio.CancelledError:
+            # The server is shutting down underneath this connection
+            pass
+        finally:
+            # Never leave the responder behind, however the connection ended
+            if not responder.done():
+                responder.cancel()
+            await asyncio.gather(responder, return_exceptions=True)
+            writer.close()
+
+    async def _respond(self, queue, writer):
+        """Answer queued requests, batching whatever has piled up"""
+        done = False
+        while not done:
+            item = await queue.get()
+            if item is None:
+                break
+
+            # Pick up any requests that were pipelined in behind this one
+            batch = [item]
+            while len(batch) < self.batchSize and not queue.empty():
+                item = queue.get_nowait()
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+
+            # Runs of translations for the same session go together
+            responses = []
+            i = 0
+            while i < len(batch):
+                request = batch[i][0]
+                j = i + 1
+                if request.get('op') == 'translate':
+                    while j < len(batch) and (
+                            batch[j][0].get('op') == 'translate' and
+                            batch[j][0].get('session') ==
+                            request.get('session')):
+                        j += 1
+                try:
+                    if request.get('op') == 'translate':
+                        responses += await self._translate(
+                            request.get('session'),
+                            [payload for _, payload in batch[i:j]]
+                        )
+                    else:
+                        responses.append(self._handle(request))
+                except Exception as error:
+                    # One bad request mustn't take the connection down
+                    failure = ({'ok': False, 'error': str(error)}, b'')
+                    responses += [failure] * (j - i)
+                i = j
+
+            for response, body in responses:
+                response['size'] = len(body)
+                writer.write(json.dumps(response).encode() + b'\n')
+                writer.write(body)
+            await writer.drain()
+
+    async def _translate(self, name, payloads):
+        """Translate a batch of payloads through one session"""
+        machine = self.sessions.get(name)
+        if machine is None:
+            error = (
+                {'ok': False, 'error': 'No session named ' + str(name)}, b''
+            )
+            return [error] * len(payloads)
+
+        loop = asyncio.get_running_loop()
+        async with self._locks[name]:
+            try:
+                chunks = await loop.run_in_executor(
+                    None,
+                    lambda: [
+                        bytes(machine.translateChunk(p)) for p in payloads
+                    ]
+                )
+            except Exception as error:
+                failure = ({'ok': False, 'error': str(error)}, b'')
+                return [failure] * len(payloads)
+
+        return [({'ok': True}, chunk) for chunk in chunks]
+
+    def _handle(self, request):
+        """Handle a request that doesn't translate anything"""
+        op = request.get('op')
+        name = request.get('session')
+        try:
+            if op == 'open':
+                self._open(name, request)
+                return {'ok': True}, b''
+
+            if op == 'settings':
+                machine = self.sessions[name]
+                return {
+                    'ok': True,
+                    'settings': [rotor.setting for rotor in machine.rotors]
+                }, b''
+
+            if op == 'close':
+                self._save(name)
+                del self.sessions[name]
+                self._locks.pop(name, None)
+                self._paths.pop(name, None)
+                return {'ok': True}, b''
+
+            if op == 'list':
+                return {'ok': True, 'sessions': sorted(self.sessions)}, b''
+
+            if op == 'error':
+                return {'ok': False, 'error': request['error']}, b''
+
+            raise ValueError(str(op) + ' is not a valid op')
+
+        except KeyError as error:
+            return {'ok': False, 'error': 'Missing ' + str(error)}, b''
+        except (TypeError, ValueError, OSError) as error:
+            return {'ok': False, 'error': str(error)}, b''
+
+    def _open(self, name, request):
+        """Create (or replace) a session from an open request"""
+        if not isinstance(name, str):
+            raise ValueError('Sessions need a name')
+
+        mode = str(request.get('mode', 'classic')).upper()
+        if mode not in emachine.MODE.__members__:
+            raise ValueError(repr(request['mode']) + ' is not a valid mode')
+        output = str(request.get('output', 'pentagraph')).upper()
+        if output not in emachine.OUTPUT.__members__:
+            raise ValueError(
+                repr(request['output']) + ' is not a valid output'
+            )
+        options = {
+            'machineMode': emachine.MODE[mode],
+            'outputMode': emachine.OUTPUT[output]
+        }
+        path = request.get('state')
+        if path is not None and not isinstance(path, str):
+            raise TypeError('State paths must be strings')
+        if path:
+            with open(path, 'rb') as file:
+                machine = emachine.Machine(state=file.read(), **options)
+        elif request.get('seed'):
+            machine = emachine.Machine(stateSeed=request['seed'], **options)
+        else:
+            plugboard = request.get('plugboard', [])
+            pin = (str, int) if mode == 'BYTE' else str
+            lengths = (2, 4) if mode == 'BYTE' else (2,)
+            if not isinstance(plugboard, list) or not all(
+                    isinstance(pair, str) and len(pair) in lengths or
+                    isinstance(pair, list) and len(pair) == 2 and
+                    all(isinstance(x, pin) for x in pair)
+                    for pair in plugboard):
+                raise TypeError('Plugboard must be a list of pin pairs')
+            if not isinstance(request['rotors'], list) or not all(
+                    isinstance(rotor, str) for rotor in request['rotors']):
+                raise TypeError('Rotors must be a list of strings')
+            if not isinstance(request['reflector'], str):
+                raise TypeError('Reflector must be a string')
+            machine = emachine.Machine(
+                plugboardStack=plugboard,
+                rotorStack=request['rotors'],
+                reflector=request['reflector'],
+                **options
+            )
+
+        self.sessions[name] = machine
+        self._locks.setdefault(name, asyncio.Lock())
+        self._paths.pop(name, None)
+        if path and request.get('update'):
+            self._paths[name] = path
+
+
+class Client:
+    """Minimal blocking client for the translation daemon"""
+
+    def __init__(self, address):
+        kind, where = _split(address)
+        if kind == 'unix':
+            sock = socket.socket(socket.AF_UNIX)
+            sock.connect(where)
+        else:
+            sock = socket.create_connection(where)
+        self.socket = sock
+        self.file = sock.makefile('rwb')
+
+    def _send(self, request, payload=b''):
+        request = dict(request, size=len(payload))
+        self.file.write(json.dumps(request).encode() + b'\n')
+        self.file.write(payload)
+
+    def _receive(self):
+        response = json.loads(self.file.readline().decode())
+        body = self.file.read(response.get('size', 0))
+        if not response['ok']:
+            raise RuntimeError(response['error'])
+        return response, body
+
+    def request(self, request, payload=b''):
+        """Send one request and wait for its response"""
+        self._send(request, payload)
+        self.file.flush()
+        return self._receive()
+
+    def open(self, session, **options):
+        """Open a session; see `Server` for the options"""
+        self.request(dict(options, op='open', session=session))
+
+    def translate(self, session, data):
+        """Translate data through a session"""
+        return self.request({'op': 'translate', 'session': session}, data)[1]
+
+    def translateMany(self, session, chunks):
+        """Pipeline many translations at once, returning all the results"""
+        chunks = list(chunks)
+        for chunk in chunks:
+            self._send({'op': 'translate', 'session': session}, chunk)
+        self.file.flush()
+        return [self._receive()[1] for chunk in chunks]
+
+    def settings(self, session):
+        """Get a session's rotor settings"""
+        return self.request({'op': 'settings', 'session': session})[0][
+            'settings'
+        ]
+
+    def close(self, session=None):
+        """Close a session, or the connection itself if no session is given"""
+        if session is not None:
+            self.request({'op': 'close', 'session': session})
+            return
+        self.file.close()
+        self.socket.close()
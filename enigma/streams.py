@@ -0,0 +1,111 @@
+# stdlib imports
+import bz2
+import io
+import lzma
+import zlib
+
+# third party imports
+
+# local module imports
+
+
+# Incremental (de)compressor factories for each supported format
+DECOMPRESSORS = {
+    'bz2': bz2.BZ2Decompressor,
+    'gzip': lambda: zlib.decompressobj(16 + zlib.MAX_WBITS),
+    'lzma': lzma.LZMADecompressor
+}
+COMPRESSORS = {
+    'bz2': bz2.BZ2Compressor,
+    'gzip': lambda: zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS),
+    'lzma': lzma.LZMACompressor
+}
+
+
+class DecompressReader(io.RawIOBase):
+    """
+    Read-only stream that decompresses another stream as it is read. Never
+    holds more than one raw chunk and one read's worth of output in memory,
+    and handles concatenated streams (as produced by `cat a.bz2 b.bz2`).
+    """
+
+    def __init__(self, stream, kind, chunkSize=1 << 16):
+        self.stream = stream
+        self.chunkSize = chunkSize
+        self._factory = DECOMPRESSORS[kind]
+        self._decompressor = self._factory()
+        self._fed = False
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = b''
+        while not data and not self._eof:
+            data = self._decompress(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def _decompress(self, size):
+        """Decompress at most `size` more bytes, reading input as needed"""
+        decompressor = self._decompressor
+
+        # Start over with a fresh decompressor for the next concatenated stream
+        if decompressor.eof:
+            data = decompressor.unused_data
+            decompressor = self._decompressor = self._factory()
+            self._fed = False
+            if not data:
+                data = self.stream.read(self.chunkSize)
+            if not data:
+                self._eof = True
+                return b''
+
+        # zlib hands back input it didn't get to instead of buffering it
+        elif getattr(decompressor, 'unconsumed_tail', b''):
+            data = decompressor.unconsumed_tail
+
+        elif getattr(decompressor, 'needs_input', True):
+            data = self.stream.read(self.chunkSize)
+            if not data:
+                self._eof = True
+                if self._fed:
+                    raise EOFError(
+                        'Compressed stream ended before the end-of-stream '
+                        'marker was reached'
+                    )
+                return b''
+
+        else:
+            data = b''
+
+        self._fed = self._fed or bool(data)
+        return decompressor.decompress(data, size)
+
+
+class CompressWriter(io.RawIOBase):
+    """
+    Write-only stream that compresses everything written to it on the way to
+    another stream. Closing it flushes the compressor, but leaves the
+    underlying stream open.
+    """
+
+    def __init__(self, stream, kind):
+        self.stream = stream
+        self._compressor = COMPRESSORS[kind]()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        compressed = self._compressor.compress(bytes(data))
+        if compressed:
+            self.stream.write(compressed)
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self.stream.write(self._compressor.flush())
+            self.stream.flush()
+        super().close()
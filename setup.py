@@ -36,6 +36,9 @@ setuptools.setup(
     install_requires=[
         'colorama'
     ],
+    extras_require={
+        'numpy': ['numpy']
+    },
     classifiers=[
         'Environment :: Console',
         'Operating System :: OS Independent',
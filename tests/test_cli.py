@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MACHINE = ['-ro', '11', '12', '13', '-rf', '1b', '--no-progress']
+
+
+def enigma(*args, **kwargs):
+    """Run the command-line interface, returning its stdout"""
+    return subprocess.run(
+        [sys.executable, '-m', 'enigma'] + MACHINE + list(args),
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+        **kwargs
+    ).stdout
+
+
+@pytest.fixture
+def plain(tmp_path):
+    path = tmp_path / 'plain.txt'
+    path.write_bytes(b'HELLO WORLD\n' * 1000)
+    return path
+
+
+@pytest.fixture
+def expected(plain, tmp_path):
+    path = tmp_path / 'expected.txt'
+    enigma('-ip', str(plain), '-op', str(path))
+    return path.read_bytes()
+
+
+def test_output_path_to_stdout_device(plain, expected):
+    assert expected
+    assert enigma('-ip', str(plain), '-op', '/dev/stdout') == expected
+
+
+def test_output_std_beats_output_path(plain, expected, tmp_path):
+    path = tmp_path / 'out.txt'
+    assert enigma('-ip', str(plain), '-os', '-op', str(path)) == expected
+    assert not path.exists()
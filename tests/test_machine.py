@@ -0,0 +1,40 @@
+import pytest
+
+import enigma.machine as emachine
+
+
+def machine(plugboard):
+    return emachine.Machine(
+        plugboardStack=plugboard,
+        rotorStack=['11', '12', '13'],
+        reflector='1b'
+    )
+
+
+@pytest.mark.parametrize('plugboard', [
+    ['AB', 'BC'],
+    ['AB', 'CA'],
+    ['AA'],
+    [['A', 'A']],
+])
+def test_plugboard_rejects_reused_pins(plugboard):
+    with pytest.raises(ValueError):
+        machine(plugboard)
+
+
+def test_plugboard_state_round_trip():
+    original = machine(['AB', 'CD'])
+    restored = emachine.Machine(state=original.stateGet())
+    assert restored.plugboard == original.plugboard
+
+
+def test_changing_mode_changes_grouping():
+    enigma = machine([])
+    grouped = bytes(enigma.translateChunk(b'HELLOWORLD'))
+    enigma.breakGo()
+    enigma.mode = emachine.OUTPUT.CONTINUOUS
+    assert bytes(enigma.translateChunk(b'HELLOWORLD')) == \
+        grouped.replace(b' ', b'')
+    enigma.breakGo()
+    enigma.mode = emachine.OUTPUT.PENTAGRAPH
+    assert bytes(enigma.translateChunk(b'HELLOWORLD')) == grouped